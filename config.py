@@ -22,19 +22,82 @@ USE_OPENAI_CHAT = False  # Use OpenAI GPT for chat generation (paid service)
 OPENAI_CHAT_MODEL = "gpt-4.1-mini"  # OpenAI chat model
 OPENAI_CHAT_TIMEOUT = 30
 
+# Shared OpenAI HTTP connection pool (used by both chat and TTS)
+OPENAI_POOL_MAX_CONNECTIONS = 10
+OPENAI_POOL_MAX_KEEPALIVE = 5  # Idle connections held open for reuse
+OPENAI_POOL_KEEPALIVE_EXPIRY = 120  # Seconds an idle pooled connection is kept
+OPENAI_WARMUP_AT_BOOT = True  # Open a connection with a cheap request before the first customer
+OPENAI_KEEPALIVE_INTERVAL = 45  # Seconds of idle before a keep-alive request; 0 disables
+
 # Ollama Fallback Configuration (used when USE_OPENAI_CHAT=False)
 OLLAMA_MODEL = "mistral-small:24b"
 OLLAMA_TEMPERATURE = 0.7
 OLLAMA_TIMEOUT = 6
+OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_KEEP_ALIVE = -1  # How long the model stays in memory after a request: seconds, "30m", or -1 to pin it
+OLLAMA_PRELOAD_AT_BOOT = True  # Load the model into memory before the first customer
+OLLAMA_PRELOAD_TIMEOUT = 180  # Seconds allowed for a cold load of the model
+OLLAMA_HEALTH_CACHE_SECONDS = 30  # Reuse a health check result for this long
+OLLAMA_RESIDENCY_INTERVAL = 60  # Seconds between checks that the model is still loaded; 0 disables
+
+# Chat backend routing: USE_OPENAI_CHAT picks the primary, the other backend is the hedge
+LLM_HEDGING_ENABLED = True  # Race the other backend when the primary is slow to produce a first token
+LLM_HEDGE_TO_OPENAI = False  # Allow OpenAI (paid) as the hedge for Ollama when USE_OPENAI_CHAT=False
+LLM_HEDGE_DEADLINE = 2.5  # Max seconds to wait for the primary's first token before hedging
+LLM_HEDGE_MIN_DELAY = 0.5  # Never hedge sooner than this, even if the primary's p95 is lower
+LLM_LATENCY_WINDOW = 50  # Recent requests per backend used for p50/p95
+LLM_LATENCY_MAX_AGE = 600  # Seconds before a latency sample stops counting, so a slow backend is retried
+LLM_LATENCY_SLO = 3.0  # A backend whose p50 first-token latency is above this is tried second
+LLM_BACKEND_FAILURE_LIMIT = 3  # Consecutive failures, or races lost to the hedge, before a backend is tried second
+LLM_BACKEND_COOLDOWN = 60  # Seconds a failing backend stays second
+LLM_MAX_TOKENS = 150  # Output cap for personalities that don't set their own max_tokens
+
+# Prompt size limits
+CONTEXT_TOKEN_BUDGET = 2000  # Max input tokens per turn: system prompt, history and question note
+CONTEXT_MIN_RECENT_MESSAGES = 4  # Newest messages always sent verbatim, even over budget
+CONTEXT_SUMMARY_CHARS = 100  # Older messages are cut to this length when condensed
+CONTEXT_SUMMARY_TOKENS = 150  # Part of the budget set aside for the condensed note
 
 # TTS Configuration
 USE_OPENAI_TTS = False  # Use OpenAI TTS for high-quality, fast generation (paid service)
 OPENAI_TTS_MODEL = "gpt-4o-mini-tts"  # Options: "tts-1", "tts-1-hd", "gpt-4o-mini-tts" (supports instructions)
 OPENAI_TTS_VOICE = "echo"  # Options: "alloy", "echo", "fable", "onyx", "nova", "shimmer"
 OPENAI_TTS_SPEED = 1.0  # Speed: 0.25 to 4.0
-OPENAI_TTS_FORMAT = "wav"  # Format: "mp3", "opus", "aac", "flac", "wav", "pcm"
+OPENAI_TTS_FORMAT = "opus"  # Format: "mp3", "opus", "aac", "flac", "wav", "pcm" (opus is ~10x smaller than wav)
+OPENAI_TTS_STREAMING = True  # Play the speech response as it downloads instead of waiting for the whole file
+OPENAI_TTS_STREAM_SAMPLE_RATE = 24000  # OpenAI "pcm" output is 24 kHz 16-bit mono
+OPENAI_TTS_STREAM_CHUNK_BYTES = 4800  # ~100ms of pcm per read
+TTS_ARCHIVE_BITRATE = "32k"  # Streamed responses are re-encoded to Opus at this bitrate before being kept
+AUDIO_RETENTION_MAX_FILES = 200  # Oldest synthesized responses in AUDIO_DIR are deleted beyond these limits
+AUDIO_RETENTION_MAX_BYTES = 50 * 1024 * 1024
+
+# TTS Phrase Cache: synthesized audio keyed by text and voice settings, so repeated lines skip the API
+TTS_CACHE_ENABLED = True
+TTS_CACHE_DIR = "cache/tts"
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024  # Least recently played phrases are evicted past this size
+TTS_PRERENDER_AT_BOOT = True  # Render every personality's greeting and recovery line into the cache at startup
+TTS_PRERENDER_WORKERS = 4
+
+OPENAI_TTS_TIMEOUT = 4  # Seconds to wait for audio before treating OpenAI TTS as down and falling back
+
+# TTS Backend Selection
+TTS_BACKEND = "openai"  # "openai" or "local"
+TTS_AUTO_FALLBACK = True  # Try the other backend when the selected one fails or times out
+LOCAL_TTS_ENGINE = "piper"  # "piper" (voice models stay loaded in-process) or "espeak"
+LOCAL_TTS_VOICE_DIR = "voices"  # Piper <name>.onnx models with their <name>.onnx.json configs
+ESPEAK_COMMAND = ["espeak-ng"]
+LOCAL_TTS_CACHE_DIR = "cache/local_tts"  # Pre-rendered phrases (silence bank, boot lines) when speaking locally
 
-# Fallback: macOS 'say' command is used if OpenAI TTS fails
+# Fallback: macOS 'say' command is used if every TTS backend fails
+
+# Audio Playback: one persistent output stream with a queue instead of an afplay process per line
+PLAYER_SAMPLE_RATE = 24000  # Rate compressed TTS formats are decoded to before playback
+PLAYER_BLOCK_MS = 50  # Write size; bounds how long cancelling takes to silence the speaker
+
+# Pipelined Turns: stream LLM tokens and speak each sentence as soon as it is complete
+PIPELINED_TURNS = True
+PIPELINE_TTS_WORKERS = 3  # Sentences synthesized in parallel while earlier ones play
+PIPELINE_MIN_SENTENCE_CHARS = 20  # Shorter fragments ("Yeah.") are merged into the next sentence
 
 # Text Chat Configuration
 ENABLE_TEXT_CHAT = True  # Enable text chat input in web interface
@@ -45,10 +108,45 @@ AUDIO_SAMPLE_RATE = 16000
 AUDIO_CHANNELS = 1
 MAX_RECORDING_TIME = 30  # seconds
 MIN_AUDIO_FILE_SIZE = 1000  # bytes
+CAPTURE_BACKEND = "stream"  # "stream": persistent in-process input stream (needs sounddevice), "rec": SoX per recording
+CAPTURE_BUFFER_SECONDS = 120  # Ring buffer length; captured segments are read straight from it
+CAPTURE_BLOCK_SIZE = 1600  # Frames per audio callback (100 ms at 16 kHz)
+CAPTURE_PREROLL_MS = 400  # Audio from just before the press that is prepended to each recording
 
 # Whisper Configuration
 WHISPER_MODEL = "tiny.en"
 WHISPER_LANGUAGE = "en"
+WHISPER_BACKEND = "local"  # "local" keeps the model loaded in-process, "cli" runs the whisper command per utterance
+
+# STT Worker Pool (WHISPER_BACKEND = "local" only; 0 decodes inside the app process)
+STT_WORKER_PROCESSES = 2
+STT_THREADS_PER_WORKER = 2  # Torch threads per worker - workers x threads is the STT CPU budget
+STT_QUEUE_SIZE = 8  # Jobs allowed to wait for a worker
+STT_QUEUE_TIMEOUT = 5  # Seconds a submit waits for queue space before it is rejected
+STT_RESULT_TIMEOUT = 60  # Seconds to wait for a queued transcription before giving up on it
+STT_PRIORITY_LIVE = 0  # Lower values are decoded first
+STT_PRIORITY_BATCH = 10
+BATCH_TRANSCRIPT_FILE = "transcripts.json"  # Written into each session folder by --batch-transcribe
+
+# Transcript Cache - keyed by audio content, model and language; kept outside
+# TRANSCRIPTS_DIR because that folder is wiped at startup
+STT_CACHE_ENABLED = True
+STT_CACHE_DIR = "cache/transcripts"
+STT_CACHE_MAX_ENTRIES = 5000
+STT_CACHE_MAX_BYTES = 5 * 1024 * 1024
+
+# Voice Activity Detection (requires numpy) - skips Whisper for silent clips and trims silence
+VAD_ENABLED = True
+VAD_THRESHOLD_DBFS = -45.0  # Frames quieter than this are never speech
+VAD_NOISE_MARGIN_DB = 10.0  # Speech must be this far above the clip's noise floor
+VAD_FRAME_MS = 20
+VAD_PADDING_MS = 200  # Audio kept either side of the detected speech
+VAD_MIN_SPEECH_MS = 150  # Less voiced audio than this counts as silence
+
+# Streaming STT Configuration (requires WHISPER_BACKEND = "local")
+STREAMING_STT_ENABLED = True  # Decode audio in chunks while the talk button is still held
+STREAMING_STT_CHUNK_SECONDS = 3.0  # Audio accumulated before each incremental decode
+STREAMING_STT_SEARCH_SECONDS = 0.6  # Tail of each chunk searched for a quiet point to cut at
 
 # Directory Configuration
 RECORDINGS_DIR = "recordings"
@@ -59,12 +157,18 @@ ASSETS_DIR = "asset"
 # Web Interface Configuration
 WEB_PORT = 8080
 WEB_HOST = "localhost"
+BROWSER_AUDIO_CAPTURE = True  # Record in the browser (MediaRecorder) and upload chunks instead of using the host mic
 
 # Personality Configuration
 DEFAULT_PERSONALITY = "sarcastic_comedian"  # Default personality key
 BEER_DISPENSED_TRIGGER = "BEER HERE!"
 BEER_DISPENSED_MESSAGE = "🍺 BEER DISPENSED! 🍺"
 CONVERSATION_ENDED_MESSAGE = "Conversation ended - Ready for next customer"
+RECOVERY_MESSAGE = "Sorry about that. Let's start over. You looking for a beer or what?"
+SILENCE_BANK_ENABLED = True  # Answer silent or failed transcriptions from pre-generated responses
+SILENCE_BANK_SIZE = 2  # Responses kept ready per personality and question number
+SILENCE_BANK_MAX_QUESTION = 3  # Question numbers 0..this get a bank
+SILENCE_BANK_FILE = "cache/silence_bank.json"  # Saved across restarts so boot only generates what was used up
 
 # Error Messages
 TTS_ERROR_FALLBACK = "TTS error, falling back to macOS say"
@@ -78,6 +182,10 @@ TRANSCRIPTION_FAILED_ERROR = "Failed to understand - please try again"
 TRANSCRIPT_EXTENSIONS = ['.vtt', '.srt', '.tsv', '.txt', '.json']
 
 # System Commands (macOS specific)
-AUDIO_PLAY_COMMAND = ["afplay"]
+AUDIO_PLAY_COMMAND = ["afplay"]  # Only used when sounddevice is unavailable
 TTS_FALLBACK_COMMAND = ["say", "-v", "fred"]
 AUDIO_RECORD_COMMAND = ["rec", "-r", str(AUDIO_SAMPLE_RATE), "-c", str(AUDIO_CHANNELS)]
+AUDIO_STREAM_COMMAND = AUDIO_RECORD_COMMAND + ["-q", "-b", "16", "-e", "signed-integer", "-t", "raw", "-"]
+AUDIO_DECODE_COMMAND = ["ffmpeg", "-loglevel", "error", "-i", "pipe:0",
+                        "-f", "s16le", "-ac", str(AUDIO_CHANNELS), "-ar", str(AUDIO_SAMPLE_RATE), "pipe:1"]
+UPLOAD_IDLE_TIMEOUT = 10  # Seconds without a chunk before a browser upload is treated as abandoned
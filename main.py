@@ -28,6 +28,8 @@ def main():
             python main.py --personality sarcastic_comedian  # Use specific personality
             python main.py --mode terminal --personality passive_aggressive_librarian
             python main.py --info                            # Show system information
+            python main.py --batch-transcribe                # Transcribe all recorded sessions
+            python main.py --tts-benchmark                   # Compare TTS backends' time to first audio
         """
     )
     
@@ -67,8 +69,36 @@ def main():
         help='Enable text-only testing mode (no TTS/STT, faster for development)'
     )
     
+    parser.add_argument(
+        '--batch-transcribe',
+        action='store_true',
+        help='Transcribe every session under recordings/ in parallel and exit (resumable)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Worker processes for --batch-transcribe (default: all cores)'
+    )
+    
+    parser.add_argument(
+        '--tts-benchmark',
+        action='store_true',
+        help='Measure time-to-first-audio for each available TTS backend and exit'
+    )
+    
     args = parser.parse_args()
     
+    if args.batch_transcribe:
+        from src.utils.batch_transcribe import batch_transcribe
+        batch_transcribe(workers=args.workers)
+        return
+    
+    if args.tts_benchmark:
+        from src.utils.tts_benchmark import tts_benchmark
+        tts_benchmark(*([args.personality] if args.personality else []))
+        return
+    
     try:
         # Initialize the application
         # Text-only mode automatically enables text chat and forces web interface
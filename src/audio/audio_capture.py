@@ -0,0 +1,111 @@
+"""
+In-process Audio Capture for Terry the Tube
+Keeps one microphone stream open and writes it into a preallocated ring buffer,
+so starting and stopping a recording only marks offsets into already-captured audio
+"""
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import numpy as np
+    import sounddevice as sd
+except ImportError:
+    np = None
+    sd = None
+
+from config import AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, CAPTURE_BUFFER_SECONDS, CAPTURE_BLOCK_SIZE
+
+
+class AudioCapture:
+    def __init__(self, sample_rate=AUDIO_SAMPLE_RATE, buffer_seconds=CAPTURE_BUFFER_SECONDS):
+        self.sample_rate = sample_rate
+        self.capacity = int(sample_rate * buffer_seconds)
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.frames_written = 0  # Total frames ever captured; offsets are absolute
+        self.stream = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_supported():
+        return sd is not None
+
+    def start(self):
+        self.stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=AUDIO_CHANNELS,
+            dtype='float32',
+            blocksize=CAPTURE_BLOCK_SIZE,
+            callback=self._on_audio
+        )
+        self.stream.start()
+        print(f"Audio capture stream open ({self.capacity / self.sample_rate:.0f}s ring buffer)")
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def _on_audio(self, indata, frames, time_info, status):
+        samples = indata[:, 0]
+        with self._lock:
+            position = self.frames_written % self.capacity
+            first = min(frames, self.capacity - position)
+            self.buffer[position:position + first] = samples[:first]
+            if first < frames:
+                self.buffer[:frames - first] = samples[first:]
+            self.frames_written += frames
+            listeners = list(self._listeners)
+
+        # indata is reused by the audio driver, so listeners get their own copy
+        if listeners:
+            chunk = samples.copy()
+            for listener in listeners:
+                try:
+                    listener(chunk)
+                except Exception as e:
+                    print(f"Error handling audio chunk: {e}")
+
+    def mark(self):
+        """Current absolute frame offset"""
+        with self._lock:
+            return self.frames_written
+
+    def get_segment(self, start, end=None):
+        """
+        Audio between two marks. Returns a view into the ring buffer when the segment doesn't
+        wrap (valid until the buffer comes round again), otherwise a copy.
+        """
+        with self._lock:
+            return self._read(start, end)
+
+    def _read(self, start, end=None):
+        end = self.frames_written if end is None else end
+        # Anything older than one buffer length has already been overwritten
+        start = max(start, self.frames_written - self.capacity, 0)
+        first = start % self.capacity
+        length = max(end - start, 0)
+        if first + length <= self.capacity:
+            return self.buffer[first:first + length]
+        return np.concatenate((self.buffer[first:], self.buffer[:first + length - self.capacity]))
+
+    def add_listener(self, listener, backfill_from=None):
+        """
+        Register a chunk listener. With backfill_from, the listener first receives everything
+        captured since that mark, so pre-roll audio reaches it in order with live chunks.
+        """
+        with self._lock:
+            if backfill_from is not None:
+                backlog = self._read(backfill_from).copy()
+                if len(backlog):
+                    listener(backlog)
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
@@ -4,58 +4,185 @@ Audio Manager - Orchestrates TTS, STT, and Recording
 import subprocess
 import sys
 import os
+import threading
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from .openai_tts_client import OpenAITTSClient
+from .local_tts_client import LocalTTSClient
+from .audio_player import AudioPlayer
 from .stt_handler import STTHandler
 from .recording_handler import RecordingHandler
-from config import TTS_FALLBACK_COMMAND
+from .streaming_stt import StreamingTranscriber
+from utils.cleanup import FileCleanup
+from config import (
+    TTS_FALLBACK_COMMAND, AUDIO_PLAY_COMMAND, STREAMING_STT_ENABLED, TTS_BACKEND, TTS_AUTO_FALLBACK
+)
 
 
 class AudioManager:
     def __init__(self):
-        self.openai_tts = OpenAITTSClient()
+        self.playback_listener = None
+        self.player = AudioPlayer(on_playing_changed=self._on_playing_changed) if AudioPlayer.is_supported() else None
+        self.openai_tts = OpenAITTSClient(player=self.player)
+        self.local_tts = LocalTTSClient(player=self.player)
+        self.tts_backends = self._select_tts_backends()
         self.stt_handler = STTHandler()
         self.recording_handler = RecordingHandler()
         self.current_personality = None
+        self.streaming_sessions = {}  # Recording filename -> StreamingTranscriber
+        self._pending_streaming = None
+        self._upload_streaming = {}  # Upload id -> StreamingTranscriber
+        self.file_cleanup = FileCleanup()
+        self.audio_dir_bytes_at_start = self.file_cleanup.prune_audio_directory()
+        self._reported_download_bytes = 0
 
     def set_personality(self, personality_key):
         self.current_personality = personality_key
-        if self.openai_tts.is_available():
-            self.openai_tts.set_personality(personality_key)
+        for backend in (self.openai_tts, self.local_tts):
+            if backend.is_available():
+                backend.set_personality(personality_key)
+
+    def _select_tts_backends(self):
+        """Available TTS backends in the order they are tried"""
+        backends = [self.local_tts, self.openai_tts] if TTS_BACKEND == "local" else [self.openai_tts, self.local_tts]
+        if not TTS_AUTO_FALLBACK:
+            backends = backends[:1]
+        return [backend for backend in backends if backend.is_available()]
+
+    def _get_cached_audio(self, text):
+        for backend in self.tts_backends:
+            cached = backend.get_cached_audio(text)
+            if cached:
+                return backend, cached
+        return None, None
 
     def text_to_speech(self, text):
-        try:
-            if self.openai_tts.is_available():
-                return self.openai_tts.text_to_speech(text)
-            else:
-                # Fallback to macOS say command
-                return self._fallback_tts(text)
-        except Exception as e:
-            print(f"TTS error: {e}, falling back to macOS say")
-            return self._fallback_tts(text)
+        _, cached = self._get_cached_audio(text)
+        if cached:
+            return cached
+        for backend in self.tts_backends:
+            try:
+                return backend.text_to_speech(text, use_cache=False)
+            except Exception as e:
+                print(f"TTS error ({backend.name}): {e}")
+        # Last resort: macOS say command
+        return self._fallback_tts(text)
+
+    def text_to_speech_with_callback(self, text, callback=None, on_finish=None):
+        # Repeated lines (greetings, recovery, exit lines) play from the phrase cache
+        backend, cached = self._get_cached_audio(text)
+        if cached:
+            return backend.play_audio_file(cached, callback, on_finish)
+        for backend in self.tts_backends:
+            try:
+                return backend.text_to_speech_with_callback(text, callback, use_cache=False, on_finish=on_finish)
+            except Exception as e:
+                print(f"TTS error ({backend.name}): {e}")
+        # Last resort: macOS say command with callback
+        return self._fallback_tts_with_callback(text, callback, on_finish)
+
+    def synthesize_segment(self, text):
+        """Render one segment of a pipelined response; None means it will be spoken with say"""
+        _, cached = self._get_cached_audio(text)
+        if cached:
+            return cached
+        for backend in self.tts_backends:
+            try:
+                return backend.text_to_speech(text, use_cache=False)
+            except Exception as e:
+                print(f"TTS error ({backend.name}): {e}")
+        return None
 
-    def text_to_speech_with_callback(self, text, callback=None):
+    def play_segment(self, text, audio_file=None):
+        """Play one segment and block until it finishes, so segments never overlap"""
+        if self.player:
+            if audio_file:
+                item = self.player.play_file(audio_file)
+            else:
+                item = self.player.play_command(TTS_FALLBACK_COMMAND + [text])
+            item.wait()
+            return
         try:
-            if self.openai_tts.is_available():
-                return self.openai_tts.text_to_speech_with_callback(text, callback)
+            if audio_file:
+                subprocess.run(AUDIO_PLAY_COMMAND + [audio_file])
             else:
-                # Fallback to macOS say command with callback
-                return self._fallback_tts_with_callback(text, callback)
+                subprocess.run(TTS_FALLBACK_COMMAND + [text])
         except Exception as e:
-            print(f"TTS error: {e}, falling back to macOS say")
-            return self._fallback_tts_with_callback(text, callback)
+            print(f"Error playing audio: {e}")
+
+    def prerender(self, phrases):
+        """
+        Put (personality_key, text) pairs in the phrase cache of the backend that will speak them;
+        returns how many were rendered
+        """
+        if not self.tts_backends:
+            return 0
+        return self.tts_backends[0].prerender(phrases)
+
+    def prerender_in_background(self, phrases):
+        """Fill the phrase cache with (personality_key, text) pairs without holding up startup"""
+        if not self.tts_backends:
+            return None
+        thread = threading.Thread(target=self.prerender, args=(phrases,), daemon=True)
+        thread.start()
+        return thread
+
+    def preload_voices_in_background(self, personality_keys):
+        """Load the local TTS voices for these personalities without holding up startup"""
+        if self.local_tts not in self.tts_backends:
+            return None
+        thread = threading.Thread(target=self.local_tts.preload_voices, args=(personality_keys,), daemon=True)
+        thread.start()
+        return thread
+
+    def set_playback_listener(self, listener):
+        """listener(playing) is called when Terry starts talking and when the last queued line ends"""
+        self.playback_listener = listener
+
+    def _on_playing_changed(self, playing):
+        if self.playback_listener:
+            self.playback_listener(playing)
+        if not playing:
+            self.report_audio_usage()
+
+    def report_audio_usage(self):
+        """Log TTS bytes downloaded since the last report and the size of AUDIO_DIR, pruning it to its limits"""
+        downloaded = self.openai_tts.bytes_received
+        turn_bytes, self._reported_download_bytes = downloaded - self._reported_download_bytes, downloaded
+        disk_bytes = self.file_cleanup.prune_audio_directory()
+        growth = disk_bytes - self.audio_dir_bytes_at_start
+        print(f"Audio usage: {turn_bytes / 1024:.1f} KB downloaded this turn ({downloaded / 1024 / 1024:.2f} MB total), "
+              f"audio dir {disk_bytes / 1024 / 1024:.2f} MB ({growth / 1024 / 1024:+.2f} MB since start)")
+        return {"turn_bytes": turn_bytes, "downloaded_bytes": downloaded,
+                "audio_dir_bytes": disk_bytes, "audio_dir_growth_bytes": growth}
+
+    def stop_playback(self):
+        if self.player:
+            self.player.cancel()
+
+    def wait_until_quiet(self, timeout=None):
+        """Block until everything queued for playback has been heard"""
+        return self.player.wait_until_idle(timeout) if self.player else True
+
+    def is_speaking(self):
+        return self.player.is_playing() if self.player else False
 
     def _fallback_tts(self, text):
         try:
+            if self.player:
+                self.player.play_command(TTS_FALLBACK_COMMAND + [text])
+                return "macOS_say_output"
             subprocess.Popen(TTS_FALLBACK_COMMAND + [text])
             return "macOS_say_output"  # Placeholder since no file is created
         except Exception as e:
             print(f"Fallback TTS failed: {e}")
             return None
 
-    def _fallback_tts_with_callback(self, text, callback=None):
+    def _fallback_tts_with_callback(self, text, callback=None, on_finish=None):
         try:
+            if self.player:
+                self.player.play_command(TTS_FALLBACK_COMMAND + [text], on_start=callback, on_finish=on_finish)
+                return "macOS_say_output"
             if callback:
                 callback()  # Call callback before speaking
             subprocess.Popen(TTS_FALLBACK_COMMAND + [text])
@@ -65,16 +192,74 @@ class AudioManager:
             return None
 
     def speech_to_text(self, audio_file):
-        return self.stt_handler.speech_to_text(audio_file)
+        captured = self.recording_handler.pop_captured_audio(audio_file)
+        streaming = self.streaming_sessions.pop(audio_file, None)
+        if streaming:
+            transcription = streaming.finish()
+            if transcription is not None:
+                return transcription
+            print("Streaming transcription failed, decoding full recording")
+        # Prefer the in-memory segment; the WAV may still be being archived
+        return self.stt_handler.speech_to_text(captured if captured is not None else audio_file)
 
-    def record_while_spacebar(self):
-        return self.recording_handler.record_while_spacebar()
+    def record_while_spacebar(self, on_partial=None):
+        streaming = self._create_streaming_session(on_partial)
+        filename = self.recording_handler.record_while_spacebar(
+            on_chunk=streaming.feed if streaming else None
+        )
+        return self._register_streaming_session(filename, streaming)
 
-    def start_web_recording(self):
-        return self.recording_handler.start_web_recording()
+    def start_web_recording(self, on_partial=None):
+        self._pending_streaming = self._create_streaming_session(on_partial)
+        return self.recording_handler.start_web_recording(
+            on_chunk=self._pending_streaming.feed if self._pending_streaming else None
+        )
 
     def stop_web_recording(self):
-        return self.recording_handler.stop_web_recording()
+        filename = self.recording_handler.stop_web_recording()
+        streaming, self._pending_streaming = self._pending_streaming, None
+        return self._register_streaming_session(filename, streaming)
+
+    def start_upload_recording(self, upload_id, on_partial=None, on_expired=None):
+        """on_expired() is called if the upload is closed because its chunks stopped arriving"""
+        streaming = self._create_streaming_session(on_partial)
+        previous = self._upload_streaming.pop(upload_id, None)
+        if previous:
+            previous.cancel()
+        self._upload_streaming[upload_id] = streaming
+
+        def expired():
+            abandoned = self._upload_streaming.pop(upload_id, None)
+            if abandoned:
+                abandoned.cancel()
+            if on_expired:
+                on_expired()
+
+        self.recording_handler.start_upload_recording(
+            upload_id, on_chunk=streaming.feed if streaming else None, on_expired=expired
+        )
+
+    def add_upload_chunk(self, upload_id, data):
+        self.recording_handler.add_upload_chunk(upload_id, data)
+
+    def stop_upload_recording(self, upload_id):
+        filename = self.recording_handler.stop_upload_recording(upload_id)
+        return self._register_streaming_session(filename, self._upload_streaming.pop(upload_id, None))
+
+    def _create_streaming_session(self, on_partial):
+        if STREAMING_STT_ENABLED and self.stt_handler.backend == "local":
+            return StreamingTranscriber(self.stt_handler, on_partial)
+        return None
+
+    def _register_streaming_session(self, filename, streaming):
+        if streaming:
+            if filename:
+                # No more partials once the user has let go; speech_to_text collects the rest
+                streaming.close_partials()
+                self.streaming_sessions[filename] = streaming
+            else:
+                streaming.cancel()
+        return filename
 
     def set_recording_session_folder(self, session_folder):
         self.recording_handler.set_session_folder(session_folder)
@@ -86,12 +271,18 @@ class AudioManager:
         self.recording_handler.cleanup_old_recordings()
 
     def get_system_info(self):
-        tts_available = self.openai_tts.is_available()
-        tts_model = "OpenAI TTS" if tts_available else "macOS say (fallback)"
+        tts_names = {"openai": "OpenAI TTS", "local": f"Local TTS ({self.local_tts.engine})"}
+        tts_model = " -> ".join(tts_names[backend.name] for backend in self.tts_backends) or "macOS say (fallback)"
 
         return {
             "tts_model": tts_model,
             "tts_available": True,  # Always available due to fallback
+            "tts_backends": [backend.get_system_info() for backend in self.tts_backends],
+            "tts_cache": self.openai_tts.cache.get_stats() if self.openai_tts.cache else None,
+            "playback": self.player.get_metrics() if self.player else None,
             "stt_model": self.stt_handler.get_model_info(),
-            "stt_available": self.stt_handler.is_available()
+            "stt_available": self.stt_handler.is_available(),
+            "stt_vad": self.stt_handler.get_vad_stats(),
+            "stt_scheduler": self.stt_handler.get_scheduler_metrics(),
+            "stt_cache": self.stt_handler.get_cache_stats()
         }
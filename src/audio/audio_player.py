@@ -0,0 +1,262 @@
+"""
+Audio Player for Terry the Tube
+Plays everything Terry says through one long-lived output stream fed from a queue, so
+utterances never overlap, no player process is spawned per line, and callers are told
+exactly when each one starts and finishes
+"""
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import numpy as np
+    import sounddevice as sd
+except ImportError:
+    np = None
+    sd = None
+
+from config import PLAYER_SAMPLE_RATE, PLAYER_BLOCK_MS
+from .audio_utils import decode_audio
+
+
+class PlaybackItem:
+    """One queued utterance: a file, a PCM buffer, a stream of PCM chunks or a command"""
+
+    def __init__(self, kind, source, sample_rate=None, channels=1, on_start=None, on_finish=None):
+        self.kind = kind
+        self.source = source
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.started = False
+        self.cancelled = False
+        self.generation = 0  # The player's cancel generation when this was queued
+        self.error = None
+        self._done = threading.Event()
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the item has finished playing, failed or been cancelled"""
+        return self._done.wait(timeout)
+
+
+class AudioPlayer:
+    def __init__(self, on_playing_changed=None):
+        self.on_playing_changed = on_playing_changed
+        self.stream = None
+        self._stream_format = None
+        self._queue = queue.Queue()
+        self._current = None
+        self._generation = 0  # Bumped by every cancel(); older items never start
+        self._idle = threading.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+        self.metrics = {"played": 0, "cancelled": 0, "failed": 0}
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def is_supported():
+        return sd is not None and np is not None
+
+    def play_file(self, path, on_start=None, on_finish=None):
+        return self._enqueue(PlaybackItem("file", path, on_start=on_start, on_finish=on_finish))
+
+    def play_pcm(self, pcm, sample_rate, channels=1, on_start=None, on_finish=None):
+        return self._enqueue(PlaybackItem("pcm", pcm, sample_rate, channels, on_start, on_finish))
+
+    def play_stream(self, chunks, sample_rate, channels=1, on_start=None, on_finish=None):
+        """Play 16-bit PCM chunks from an iterable as they are produced"""
+        return self._enqueue(PlaybackItem("stream", chunks, sample_rate, channels, on_start, on_finish))
+
+    def play_command(self, command, on_start=None, on_finish=None):
+        """Queue an external speech command (the say fallback) so it is ordered with everything else"""
+        return self._enqueue(PlaybackItem("command", command, on_start=on_start, on_finish=on_finish))
+
+    def cancel(self):
+        """Drop everything queued and cut off whatever is playing"""
+        dropped = []
+        with self._lock:
+            # Also covers an item _run has taken off the queue but not yet started
+            self._generation += 1
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item.cancelled = True
+                    dropped.append(item)
+            if self._current:
+                self._current.cancelled = True
+        for item in dropped:
+            self._finish(item)
+
+    def is_playing(self):
+        return not self._idle.is_set()
+
+    def wait_until_idle(self, timeout=None):
+        return self._idle.wait(timeout)
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["queued"] = self._queue.qsize()
+        metrics["playing"] = self.is_playing()
+        return metrics
+
+    def _enqueue(self, item):
+        with self._lock:
+            became_busy = self._idle.is_set()
+            self._idle.clear()
+            item.generation = self._generation
+            self._queue.put(item)
+        if became_busy:
+            self._notify_playing(True)
+        return item
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            with self._lock:
+                # A cancel() since this was queued that didn't find it in the queue
+                item.cancelled = item.generation != self._generation
+                if not item.cancelled:
+                    self._current = item
+            if not item.cancelled:
+                try:
+                    self._play(item)
+                except Exception as e:
+                    item.error = e
+                    print(f"Error playing audio: {e}")
+                finally:
+                    with self._lock:
+                        self._current = None
+            self._finish(item)
+
+            with self._lock:
+                became_idle = self._queue.empty() and not self._idle.is_set()
+                if became_idle:
+                    self._idle.set()
+            if became_idle:
+                self._notify_playing(False)
+
+    def _play(self, item):
+        if item.kind == "command":
+            self._run_command(item)
+        elif item.kind == "file":
+            self._play_file(item)
+        elif item.kind == "pcm":
+            self._write(item, self._blocks(item.source, item.sample_rate, item.channels),
+                        item.sample_rate, item.channels)
+        else:
+            self._write(item, item.source, item.sample_rate, item.channels)
+
+    def _play_file(self, item):
+        path = item.source
+        try:
+            with wave.open(path, 'rb') as wav:
+                if wav.getsampwidth() != 2:
+                    raise wave.Error("not 16-bit")
+                rate, channels = wav.getframerate(), wav.getnchannels()
+                block_frames = max(rate * PLAYER_BLOCK_MS // 1000, 1)
+                chunks = iter(lambda: wav.readframes(block_frames), b"")
+                self._write(item, chunks, rate, channels)
+                return
+        except (wave.Error, EOFError):
+            pass
+
+        # Compressed formats (opus/aac/mp3) are decoded to PCM first
+        pcm = decode_audio(path, PLAYER_SAMPLE_RATE)
+        self._write(item, self._blocks(pcm, PLAYER_SAMPLE_RATE, 1), PLAYER_SAMPLE_RATE, 1)
+
+    def _blocks(self, pcm, sample_rate, channels):
+        # Small writes keep cancellation responsive
+        block_bytes = max(sample_rate * PLAYER_BLOCK_MS // 1000, 1) * 2 * channels
+        for offset in range(0, len(pcm), block_bytes):
+            yield pcm[offset:offset + block_bytes]
+
+    def _write(self, item, chunks, sample_rate, channels):
+        stream = self._open_stream(sample_rate, channels)
+        frame_bytes = 2 * channels
+        leftover = b""
+        for chunk in chunks:
+            if item.cancelled:
+                break
+            # Network chunks can split a frame; hold the remainder for the next write
+            chunk = leftover + chunk
+            usable = len(chunk) // frame_bytes * frame_bytes
+            chunk, leftover = chunk[:usable], chunk[usable:]
+            if not chunk:
+                continue
+            if not item.started:
+                item.started = True
+                self._callback(item.on_start)
+            stream.write(chunk)
+
+        if item.cancelled:
+            # Throw away audio already handed to the device
+            stream.abort()
+            stream.start()
+        else:
+            # write() returns once the device has the data; wait for it to be heard
+            time.sleep(stream.latency)
+
+    def _open_stream(self, sample_rate, channels):
+        # The device stays open between utterances; it is only reopened if the format changes
+        if self.stream is None or self._stream_format != (sample_rate, channels):
+            if self.stream is not None:
+                self.stream.close()
+            self.stream = sd.RawOutputStream(samplerate=sample_rate, channels=channels, dtype='int16')
+            self.stream.start()
+            self._stream_format = (sample_rate, channels)
+        return self.stream
+
+    def _run_command(self, item):
+        process = subprocess.Popen(item.source)
+        item.started = True
+        self._callback(item.on_start)
+        while process.poll() is None:
+            if item.cancelled:
+                process.terminate()
+                break
+            time.sleep(0.05)
+
+    def _finish(self, item):
+        with self._lock:
+            if item.cancelled:
+                self.metrics["cancelled"] += 1
+            elif item.error:
+                self.metrics["failed"] += 1
+            else:
+                self.metrics["played"] += 1
+        self._callback(item.on_finish)
+        item._done.set()
+
+    def _notify_playing(self, playing):
+        self._callback(self.on_playing_changed, playing)
+
+    def _callback(self, callback, *args):
+        if callback:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in playback callback: {e}")
+
+    def shutdown(self):
+        self.cancel()
+        self._queue.put(None)
+        if self.stream is not None:
+            self.stream.close()
@@ -0,0 +1,127 @@
+"""
+Audio buffer helpers shared by the STT and recording modules
+"""
+import os
+import shutil
+import subprocess
+import sys
+import wave
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import av
+except ImportError:
+    av = None
+
+from config import AUDIO_SAMPLE_RATE, TTS_ARCHIVE_BITRATE
+
+
+def pcm16_to_float32(data):
+    """Convert 16-bit little-endian PCM (bytes or int16 array) to float32 in [-1, 1]"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = np.frombuffer(data, dtype=np.int16)
+    return data.astype(np.float32) / 32768.0
+
+
+def float32_to_pcm16(samples):
+    """Convert float32 samples in [-1, 1] to 16-bit PCM bytes"""
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+
+def load_wav_samples(path):
+    """
+    Read a 16-bit mono WAV at AUDIO_SAMPLE_RATE into float32 samples.
+    Returns None when the file is in any other layout (or numpy is missing) so callers can fall back.
+    """
+    if np is None:
+        return None
+    try:
+        with wave.open(path, 'rb') as wav:
+            if (wav.getsampwidth() != 2 or wav.getnchannels() != 1
+                    or wav.getframerate() != AUDIO_SAMPLE_RATE):
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    return pcm16_to_float32(frames)
+
+
+def write_wav(path, samples, sample_rate=AUDIO_SAMPLE_RATE):
+    """Write float32 samples (or 16-bit PCM bytes) to a mono WAV file"""
+    if not isinstance(samples, (bytes, bytearray)):
+        samples = float32_to_pcm16(samples)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples)
+    return path
+
+
+def read_pcm_stream(pipe, buffer, on_chunk=None, read_size=3200):
+    """
+    Read 16-bit PCM from a subprocess pipe until EOF, appending to buffer and passing
+    each chunk to on_chunk. Reads can split a sample, so an odd byte is carried over.
+    """
+    fd = pipe.fileno()
+    leftover = b""
+    while True:
+        data = os.read(fd, read_size)
+        if not data:
+            break
+        data = leftover + data
+        usable = len(data) // 2 * 2
+        data, leftover = data[:usable], data[usable:]
+        buffer.extend(data)
+        if on_chunk:
+            try:
+                on_chunk(data)
+            except Exception as e:
+                print(f"Error handling audio chunk: {e}")
+
+
+def samples_duration(samples, sample_rate=AUDIO_SAMPLE_RATE):
+    return len(samples) / float(sample_rate)
+
+
+def decode_audio(path, sample_rate):
+    """
+    Decode a compressed audio file (opus, aac, mp3, ...) to 16-bit mono PCM at sample_rate.
+    Uses PyAV in-process when installed, otherwise an ffmpeg process.
+    """
+    if av is not None:
+        pcm = bytearray()
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+        with av.open(path) as container:
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    pcm.extend(resampled.to_ndarray().tobytes())
+        for resampled in resampler.resample(None):
+            pcm.extend(resampled.to_ndarray().tobytes())
+        return bytes(pcm)
+
+    return subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", path,
+         "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        stdout=subprocess.PIPE, check=True
+    ).stdout
+
+
+def can_encode_opus():
+    return shutil.which("ffmpeg") is not None
+
+
+def encode_opus(pcm, sample_rate, path):
+    """Compress 16-bit mono PCM into an Ogg Opus file for storage"""
+    subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-y", "-f", "s16le", "-ar", str(sample_rate), "-ac", "1",
+         "-i", "pipe:0", "-c:a", "libopus", "-b:a", TTS_ARCHIVE_BITRATE, path],
+        input=pcm, check=True
+    )
+    return path
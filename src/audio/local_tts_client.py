@@ -0,0 +1,212 @@
+"""
+Local TTS Client for Terry the Tube
+Offline speech synthesis for Linux hosts: Piper with its voice models kept loaded
+in-process, or eSpeak NG as a lightweight last resort
+"""
+import io
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Optional, Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    from piper.voice import PiperVoice
+except ImportError:
+    PiperVoice = None
+
+from config import (
+    LOCAL_TTS_ENGINE, LOCAL_TTS_VOICE_DIR, LOCAL_TTS_CACHE_DIR, ESPEAK_COMMAND, AUDIO_DIR, AUDIO_PLAY_COMMAND,
+    TTS_CACHE_ENABLED, TTS_CACHE_MAX_BYTES
+)
+from voice_instructions import get_local_voice_settings
+from utils.disk_cache import DiskCache
+from .audio_utils import write_wav
+
+
+class LocalTTSClient:
+    name = "local"
+
+    def __init__(self, player=None):
+        self.player = player
+        self.cache = None  # Only pre-rendered phrases; live lines are cheap enough to synthesize
+        self.current_personality = None
+        self.voices = {}  # Piper model name -> loaded PiperVoice
+        self._lock = threading.Lock()
+
+        self.espeak_available = shutil.which(ESPEAK_COMMAND[0]) is not None
+        if LOCAL_TTS_ENGINE == "piper" and PiperVoice is not None:
+            self.engine = "piper"
+        elif self.espeak_available:
+            self.engine = "espeak"
+        else:
+            self.engine = None
+            print("Local TTS unavailable: install piper-tts or espeak-ng")
+            return
+        print(f"Local TTS initialized with engine: {self.engine}")
+        if TTS_CACHE_ENABLED:
+            self.cache = DiskCache(LOCAL_TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, extension=".wav")
+
+    def is_available(self) -> bool:
+        return self.engine is not None
+
+    def set_personality(self, personality_key: str):
+        self.current_personality = personality_key
+        if self.engine == "piper":
+            # Load the voice now so the first line in this personality doesn't pay for it
+            try:
+                self._load_voice(get_local_voice_settings(personality_key)["piper_model"])
+            except Exception as e:
+                print(f"Failed to load local voice for {personality_key}: {e}")
+
+    def preload_voices(self, personality_keys):
+        """Load every personality's Piper voice so a personality switch never waits on one"""
+        if self.engine != "piper":
+            return
+        for model_name in {get_local_voice_settings(key)["piper_model"] for key in personality_keys}:
+            try:
+                self._load_voice(model_name)
+            except Exception as e:
+                print(f"Failed to preload local voice {model_name}: {e}")
+
+    def _load_voice(self, model_name):
+        with self._lock:
+            voice = self.voices.get(model_name)
+            if voice is None:
+                start_time = time.time()
+                model_path = os.path.join(LOCAL_TTS_VOICE_DIR, f"{model_name}.onnx")
+                if not os.path.exists(model_path):
+                    raise FileNotFoundError(f"Piper voice model not found: {model_path}")
+                voice = PiperVoice.load(model_path)
+                self.voices[model_name] = voice
+                print(f"Piper voice {model_name} loaded in {time.time() - start_time:.2f}s")
+            return voice
+
+    def iter_pcm(self, text: str, personality_key: Optional[str] = None):
+        """
+        Synthesize text as 16-bit mono PCM. Returns (sample_rate, chunk iterator); Piper
+        yields one chunk per sentence so playback can start after the first one.
+        """
+        settings = get_local_voice_settings(personality_key or self.current_personality)
+        if self.engine == "piper":
+            try:
+                voice = self._load_voice(settings["piper_model"])
+                return voice.config.sample_rate, self._piper_chunks(voice, text, settings["length_scale"])
+            except Exception as e:
+                if not self.espeak_available:
+                    raise
+                print(f"Piper synthesis failed ({e}), using eSpeak")
+        return self._espeak_pcm(text, settings)
+
+    def _piper_chunks(self, voice, text, length_scale):
+        if hasattr(voice, "synthesize_stream_raw"):
+            yield from voice.synthesize_stream_raw(text, length_scale=length_scale)
+            return
+        # piper-tts >= 1.3 yields AudioChunk objects and takes a SynthesisConfig
+        from piper import SynthesisConfig
+        for chunk in voice.synthesize(text, syn_config=SynthesisConfig(length_scale=length_scale)):
+            yield chunk.audio_int16_bytes
+
+    def _espeak_pcm(self, text, settings):
+        result = subprocess.run(
+            ESPEAK_COMMAND + ["--stdout", "-v", settings["espeak_voice"], "-s", str(settings["espeak_speed"]), text],
+            stdout=subprocess.PIPE, check=True
+        )
+        with wave.open(io.BytesIO(result.stdout), 'rb') as wav:
+            return wav.getframerate(), iter([wav.readframes(wav.getnframes())])
+
+    def text_to_speech(self, text: str, output_file: Optional[str] = None, use_cache: bool = True) -> str:
+        if not self.is_available():
+            raise Exception("Local TTS not available")
+
+        sample_rate, chunks = self.iter_pcm(text)
+        if not output_file:
+            audio_dir = Path(AUDIO_DIR)
+            audio_dir.mkdir(parents=True, exist_ok=True)
+            output_file = str(audio_dir / f"response_{int(time.time() * 1000) % 100000000:08x}.wav")
+        write_wav(output_file, b"".join(chunks), sample_rate)
+        print(f"Local TTS generated: {output_file}")
+        return output_file
+
+    def text_to_speech_with_callback(self, text: str, on_audio_starts: Optional[Callable] = None,
+                                     use_cache: bool = True, on_finish: Optional[Callable] = None) -> str:
+        if not self.is_available():
+            raise Exception("Local TTS not available")
+        if not self.player:
+            return self.play_audio_file(self.text_to_speech(text), on_audio_starts, on_finish)
+
+        # Synthesize the first sentence here so a failure can still fall through to the next
+        # backend; the rest is synthesized by the player thread as playback goes
+        sample_rate, chunks = self.iter_pcm(text)
+        first = next(chunks, b"")
+        self.player.play_stream(itertools.chain([first], chunks), sample_rate,
+                                on_start=on_audio_starts, on_finish=on_finish)
+        return "local_tts_stream"
+
+    def play_audio_file(self, audio_file: str, on_audio_starts: Optional[Callable] = None,
+                        on_finish: Optional[Callable] = None) -> str:
+        if self.player:
+            self.player.play_file(audio_file, on_start=on_audio_starts, on_finish=on_finish)
+            return audio_file
+        if on_audio_starts:
+            on_audio_starts()
+        try:
+            subprocess.Popen(AUDIO_PLAY_COMMAND + [audio_file])
+        except Exception as e:
+            print(f"Error playing audio: {e}")
+        return audio_file
+
+    def _cache_key(self, text: str, personality_key: Optional[str] = None) -> str:
+        settings = get_local_voice_settings(personality_key or self.current_personality)
+        return DiskCache.make_key(text, self.engine, sorted(settings.items()))
+
+    def get_cached_audio(self, text: str) -> Optional[str]:
+        """Path of a pre-rendered phrase in the current voice, or None"""
+        if self.cache is None:
+            return None
+        path = self.cache.get_path(self._cache_key(text))
+        if path:
+            print(f"Local TTS cache hit for: {text[:50]}...")
+        return path
+
+    def prerender(self, phrases) -> int:
+        """
+        Synthesize (personality_key, text) pairs into the phrase cache, skipping any already
+        cached. Returns the number of phrases rendered.
+        """
+        if not self.is_available() or self.cache is None:
+            return 0
+
+        start_time = time.time()
+        rendered = 0
+        for personality_key, text in phrases:
+            key = self._cache_key(text, personality_key)
+            if self.cache.contains(key):
+                continue
+            try:
+                sample_rate, chunks = self.iter_pcm(text, personality_key)
+                wav_data = io.BytesIO()
+                write_wav(wav_data, b"".join(chunks), sample_rate)
+                self.cache.put(key, wav_data.getvalue(), text=text[:100])
+                rendered += 1
+            except Exception as e:
+                print(f"Local TTS pre-render failed: {e}")
+        if rendered:
+            print(f"Local TTS pre-rendered {rendered}/{len(phrases)} phrase(s) in {time.time() - start_time:.2f}s")
+        return rendered
+
+    def get_system_info(self) -> dict:
+        return {
+            "local_tts_available": self.is_available(),
+            "engine": self.engine or "N/A",
+            "loaded_voices": sorted(self.voices),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "espeak_available": self.espeak_available
+        }
@@ -1,7 +1,8 @@
 import os
+import socket
 import sys
 import time
-from typing import Optional
+from typing import Optional, Callable
 
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -16,25 +17,41 @@ from config import (
     USE_OPENAI_CHAT, OPENAI_CHAT_MODEL,
     OPENAI_CHAT_TIMEOUT
 )
+from utils.openai_connection import get_openai_client
+
+
+def _abort_stream(stream):
+    """Drop the connection under a response stream, waking the thread blocked reading it"""
+    try:
+        if stream.response.is_closed:
+            return  # Fully read, and its connection is back in the pool
+        network_stream = stream.response.extensions.get("network_stream")
+        sock = network_stream.get_extra_info("socket") if network_stream else None
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except Exception:
+        pass
 
 
 class OpenAIChatClient:
-    def __init__(self):
+    def __init__(self, enabled: bool = USE_OPENAI_CHAT):
         self.client = None
         self.available = False
+        self.last_usage = None
+        self.usage_totals = {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
 
         # Check if OpenAI is available and configured
         if OpenAI is None:
             print("OpenAI package not installed")
             return
 
-        if not USE_OPENAI_CHAT:
+        if not enabled:
             print("OpenAI Chat disabled in configuration")
             return
 
         # Initialize OpenAI client
         try:
-            self.client = OpenAI()  # Uses OPENAI_API_KEY environment variable
+            self.client = get_openai_client()  # Shared pooled client; uses OPENAI_API_KEY
             self.available = True
             print(f"OpenAI Chat initialized with model: {OPENAI_CHAT_MODEL}")
         except Exception as e:
@@ -44,7 +61,35 @@ class OpenAIChatClient:
     def is_available(self) -> bool:
         return self.available and self.client is not None
 
-    def generate_response(self, system_prompt: str, user_message: str, conversation_history: list = None) -> tuple[str, float]:
+    def _build_messages(self, system_prompt, user_message, conversation_history):
+        # The system prompt goes first and unchanged so the provider can cache it as a prefix
+        messages = [{"role": "system", "content": system_prompt}]
+        if conversation_history:
+            messages.extend(conversation_history)
+        if user_message:
+            messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _limits(self, max_tokens):
+        return {"max_tokens": max_tokens} if max_tokens else {}
+
+    def _record_usage(self, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        self.last_usage = {
+            "prompt_tokens": usage.prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": usage.completion_tokens
+        }
+        for key, value in self.last_usage.items():
+            self.usage_totals[key] += value
+        print(f"Prompt tokens: {usage.prompt_tokens} ({cached_tokens} cached), "
+              f"completion tokens: {usage.completion_tokens}")
+
+    def generate_response(self, system_prompt: str, user_message: Optional[str] = None,
+                          conversation_history: list = None, max_tokens: Optional[int] = None) -> tuple[str, float]:
         """
         Generate a chat response using OpenAI GPT
         Returns (response_text, generation_time_seconds)
@@ -55,15 +100,7 @@ class OpenAIChatClient:
         start_time = time.time()
 
         try:
-            # Build messages array
-            messages = [{"role": "system", "content": system_prompt}]
-
-            # Add conversation history if provided
-            if conversation_history:
-                messages.extend(conversation_history)
-
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
+            messages = self._build_messages(system_prompt, user_message, conversation_history)
 
             print(f"Generating response with OpenAI {OPENAI_CHAT_MODEL}...")
 
@@ -71,11 +108,13 @@ class OpenAIChatClient:
             response = self.client.chat.completions.create(
                 model=OPENAI_CHAT_MODEL,
                 messages=messages,
-                timeout=OPENAI_CHAT_TIMEOUT
+                timeout=OPENAI_CHAT_TIMEOUT,
+                **self._limits(max_tokens)
             )
 
             generation_time = time.time() - start_time
             response_text = response.choices[0].message.content
+            self._record_usage(response.usage)
 
             print(f"OpenAI response generated in {generation_time:.2f}s")
             return response_text, generation_time
@@ -84,6 +123,39 @@ class OpenAIChatClient:
             print(f"OpenAI Chat generation failed: {e}")
             raise
 
+    def generate_response_stream(self, system_prompt: str, user_message: Optional[str] = None,
+                                 conversation_history: list = None, max_tokens: Optional[int] = None,
+                                 on_open: Optional[Callable] = None):
+        """
+        Generate a chat response using OpenAI GPT, yielding text deltas as they arrive.
+        max_tokens caps the output. on_open is handed a function that aborts the request.
+        """
+        if not self.is_available():
+            raise Exception("OpenAI Chat not available")
+
+        messages = self._build_messages(system_prompt, user_message, conversation_history)
+
+        print(f"Streaming response with OpenAI {OPENAI_CHAT_MODEL}...")
+        try:
+            stream = self.client.chat.completions.create(
+                model=OPENAI_CHAT_MODEL,
+                messages=messages,
+                timeout=OPENAI_CHAT_TIMEOUT,
+                stream=True,
+                stream_options={"include_usage": True},  # Final chunk carries token usage
+                **self._limits(max_tokens)
+            )
+            if on_open:
+                on_open(lambda: _abort_stream(stream))
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage:
+                    self._record_usage(chunk.usage)
+        except Exception as e:
+            print(f"OpenAI Chat streaming failed: {e}")
+            raise
+
     def get_available_models(self) -> list:
         return ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo", "gpt-3.5-turbo"]
 
@@ -110,5 +182,7 @@ class OpenAIChatClient:
             "temperature": 0.7 if self.is_available() else "N/A",
             "timeout": OPENAI_CHAT_TIMEOUT if self.is_available() else "N/A",
             "api_key_set": bool(os.getenv("OPENAI_API_KEY")),
-            "use_openai_chat": USE_OPENAI_CHAT
+            "use_openai_chat": USE_OPENAI_CHAT,
+            "last_usage": self.last_usage,
+            "usage_totals": dict(self.usage_totals)
         }
@@ -1,6 +1,11 @@
 import os
+import queue
+import shutil
+import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, Callable
 
@@ -15,16 +20,29 @@ except ImportError:
 
 from config import (
     USE_OPENAI_TTS, OPENAI_TTS_MODEL, OPENAI_TTS_VOICE,
-    OPENAI_TTS_SPEED, OPENAI_TTS_FORMAT, AUDIO_DIR
+    OPENAI_TTS_SPEED, OPENAI_TTS_FORMAT, AUDIO_DIR,
+    OPENAI_TTS_STREAMING, OPENAI_TTS_STREAM_SAMPLE_RATE, OPENAI_TTS_STREAM_CHUNK_BYTES,
+    OPENAI_TTS_TIMEOUT, TTS_CACHE_ENABLED, TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, TTS_PRERENDER_WORKERS,
+    AUDIO_PLAY_COMMAND
 )
 from voice_instructions import get_voice_settings
+from utils.disk_cache import DiskCache
+from utils.openai_connection import get_openai_client
+from .audio_utils import write_wav, can_encode_opus, encode_opus
 
 
 class OpenAITTSClient:
-    def __init__(self):
+    name = "openai"
+
+    def __init__(self, player=None):
+        self.player = player  # AudioPlayer; without one, files are played with AUDIO_PLAY_COMMAND
         self.client = None
         self.available = False
         self.current_personality = None
+        self.cache = None
+        self.requests = 0
+        self.bytes_received = 0  # Audio bytes downloaded, for per-turn bandwidth reporting
+        self._stats_lock = threading.Lock()
 
         # Check if OpenAI is available and configured
         if OpenAI is None:
@@ -37,9 +55,11 @@ class OpenAITTSClient:
 
         # Initialize OpenAI client
         try:
-            self.client = OpenAI()  # Uses OPENAI_API_KEY environment variable
+            self.client = get_openai_client()  # Shared pooled client; uses OPENAI_API_KEY
             self.available = True
             print(f"OpenAI TTS initialized with model: {OPENAI_TTS_MODEL}, voice: {OPENAI_TTS_VOICE}")
+            if TTS_CACHE_ENABLED:
+                self.cache = DiskCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, extension=f".{OPENAI_TTS_FORMAT}")
         except Exception as e:
             print(f"Failed to initialize OpenAI TTS: {e}")
             print("Make sure OPENAI_API_KEY environment variable is set")
@@ -52,7 +72,22 @@ class OpenAITTSClient:
         print(f"OpenAI TTS personality set to: {personality_key}")
 
 
-    def text_to_speech(self, text: str, output_file: Optional[str] = None) -> str:
+    def _cache_key(self, text: str, voice_settings: dict) -> str:
+        return DiskCache.make_key(
+            text, voice_settings['voice'], voice_settings['speed'], voice_settings['instruction'],
+            OPENAI_TTS_MODEL, OPENAI_TTS_FORMAT
+        )
+
+    def get_cached_audio(self, text: str) -> Optional[str]:
+        """Path of previously synthesized audio for this text in the current voice, or None"""
+        if self.cache is None:
+            return None
+        path = self.cache.get_path(self._cache_key(text, self._voice_settings()))
+        if path:
+            print(f"TTS cache hit for: {text[:50]}...")
+        return path
+
+    def text_to_speech(self, text: str, output_file: Optional[str] = None, use_cache: bool = True) -> str:
         """
         Convert text to speech using OpenAI TTS with personality-specific voice settings
         Returns path to the generated audio file
@@ -60,32 +95,17 @@ class OpenAITTSClient:
         if not self.is_available():
             raise Exception("OpenAI TTS not available")
 
-        # Get personality-specific voice settings
-        if self.current_personality:
-            voice_settings = get_voice_settings(self.current_personality)
-        else:
-            # Fallback to config defaults
-            voice_settings = {
-                "voice": OPENAI_TTS_VOICE,
-                "speed": OPENAI_TTS_SPEED,
-                "instruction": ""
-            }
-
-        try:
-            print(f"Generating TTS with OpenAI ({voice_settings['voice']}) for: {text[:50]}...")
+        voice_settings = self._voice_settings()
 
-            # Call OpenAI TTS API with personality-specific settings including instructions
-            response = self.client.audio.speech.create(
-                model=OPENAI_TTS_MODEL,
-                voice=voice_settings['voice'],
-                input=text,
-                instructions=voice_settings['instruction'],  # Pass instructions parameter
-                response_format=OPENAI_TTS_FORMAT,
-                speed=voice_settings['speed']
-            )
+        cached = self.get_cached_audio(text) if use_cache else None
+        if cached:
+            if output_file:
+                shutil.copyfile(cached, output_file)
+                return output_file
+            return cached
 
-            # Get audio data
-            audio_data = response.content
+        try:
+            audio_data = self._synthesize(text, voice_settings)
 
             # Save to output file or temp file
             if output_file:
@@ -95,10 +115,7 @@ class OpenAITTSClient:
                 return output_file
             else:
                 # Create temporary file
-                audio_dir = Path(AUDIO_DIR)
-                audio_dir.mkdir(parents=True, exist_ok=True)
-
-                temp_file = audio_dir / f"response_{int(time.time() * 1000) % 100000000:08x}.wav"
+                temp_file = self._new_audio_path()
                 with open(temp_file, "wb") as f:
                     f.write(audio_data)
                 print(f"TTS generated: {temp_file}")
@@ -108,12 +125,192 @@ class OpenAITTSClient:
             print(f"OpenAI TTS generation failed: {e}")
             raise
 
-    def text_to_speech_with_callback(self, text: str, on_audio_starts: Optional[Callable] = None) -> str:
+    def _synthesize(self, text: str, voice_settings: dict) -> bytes:
+        print(f"Generating TTS with OpenAI ({voice_settings['voice']}) for: {text[:50]}...")
+
+        # Call OpenAI TTS API with personality-specific settings including instructions
+        response = self.client.audio.speech.create(
+            model=OPENAI_TTS_MODEL,
+            voice=voice_settings['voice'],
+            input=text,
+            instructions=voice_settings['instruction'],  # Pass instructions parameter
+            response_format=OPENAI_TTS_FORMAT,
+            speed=voice_settings['speed'],
+            timeout=OPENAI_TTS_TIMEOUT
+        )
+
+        # Get audio data
+        audio_data = response.content
+        self._count_download(len(audio_data))
+        if self.cache is not None:
+            self.cache.put(self._cache_key(text, voice_settings), audio_data, text=text[:100])
+        return audio_data
+
+    def prerender(self, phrases, workers: int = TTS_PRERENDER_WORKERS) -> int:
+        """
+        Synthesize (personality_key, text) pairs into the phrase cache in parallel, skipping
+        any already cached from a previous run. Returns the number of phrases rendered.
+        """
+        if not self.is_available() or self.cache is None:
+            return 0
+
+        todo = []
+        for personality_key, text in phrases:
+            voice_settings = self._voice_settings(personality_key)
+            if not self.cache.contains(self._cache_key(text, voice_settings)):
+                todo.append((text, voice_settings))
+        if not todo:
+            print(f"TTS warm-up: all {len(phrases)} phrase(s) already cached")
+            return 0
+
+        start_time = time.time()
+        rendered = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._synthesize, text, voice_settings) for text, voice_settings in todo]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    rendered += 1
+                except Exception as e:
+                    print(f"TTS warm-up render failed: {e}")
+        print(f"TTS warm-up: rendered {rendered}/{len(todo)} phrase(s) in {time.time() - start_time:.2f}s")
+        return rendered
+
+    def _voice_settings(self, personality_key: Optional[str] = None) -> dict:
+        # Get personality-specific voice settings
+        personality_key = personality_key or self.current_personality
+        if personality_key:
+            return get_voice_settings(personality_key)
+        # Fallback to config defaults
+        return {
+            "voice": OPENAI_TTS_VOICE,
+            "speed": OPENAI_TTS_SPEED,
+            "instruction": ""
+        }
+
+    def _count_download(self, size, new_request=True):
+        with self._stats_lock:
+            self.requests += int(new_request)
+            self.bytes_received += size
+
+    def _new_audio_path(self, extension: str = OPENAI_TTS_FORMAT) -> Path:
+        audio_dir = Path(AUDIO_DIR)
+        audio_dir.mkdir(parents=True, exist_ok=True)
+        return audio_dir / f"response_{int(time.time() * 1000) % 100000000:08x}.{extension}"
+
+    def can_stream(self) -> bool:
+        return OPENAI_TTS_STREAMING and self.player is not None and self.is_available()
+
+    def stream_speech(self, text: str, on_audio_starts: Optional[Callable] = None,
+                      on_finish: Optional[Callable] = None) -> str:
+        """
+        Stream raw PCM from the speech endpoint into the audio player as it downloads.
+        Returns once the first chunk has arrived, with the path the full response will be
+        archived to when the stream ends. Raises if the request fails before any audio
+        arrives, so callers can still fall back.
+        """
+        if not self.is_available():
+            raise Exception("OpenAI TTS not available")
+
+        # Streamed PCM is re-encoded to Opus before it is kept
+        output_file = str(self._new_audio_path("opus" if can_encode_opus() else "wav"))
+        chunks = queue.Queue()
+        first_chunk = threading.Event()
+        failure = []
+
+        def fetch():
+            try:
+                for chunk in self._fetch_stream(text, output_file):
+                    chunks.put(chunk)
+                    first_chunk.set()
+            except Exception as e:
+                if not first_chunk.is_set():
+                    failure.append(e)
+                print(f"OpenAI TTS streaming failed: {e}")
+            finally:
+                chunks.put(None)
+                first_chunk.set()
+
+        threading.Thread(target=fetch, daemon=True).start()
+        if not first_chunk.wait(OPENAI_TTS_TIMEOUT):
+            raise TimeoutError(f"No TTS audio after {OPENAI_TTS_TIMEOUT}s")
+        if failure:
+            raise failure[0]
+
+        self.player.play_stream(
+            iter(chunks.get, None), OPENAI_TTS_STREAM_SAMPLE_RATE,
+            on_start=on_audio_starts, on_finish=on_finish
+        )
+        return output_file
+
+    def iter_pcm(self, text: str):
+        """Stream the response as 16-bit mono PCM: returns (sample_rate, chunk iterator)"""
+        return OPENAI_TTS_STREAM_SAMPLE_RATE, self._fetch_stream(text)
+
+    def _fetch_stream(self, text, output_file=None):
+        voice_settings = self._voice_settings()
+        print(f"Streaming TTS with OpenAI ({voice_settings['voice']}) for: {text[:50]}...")
+        request_time = time.time()
+        pcm = bytearray()
+
+        with self.client.audio.speech.with_streaming_response.create(
+            model=OPENAI_TTS_MODEL,
+            voice=voice_settings['voice'],
+            input=text,
+            instructions=voice_settings['instruction'],
+            response_format="pcm",
+            speed=voice_settings['speed'],
+            timeout=OPENAI_TTS_TIMEOUT
+        ) as response:
+            for chunk in response.iter_bytes(OPENAI_TTS_STREAM_CHUNK_BYTES):
+                if not pcm:
+                    print(f"TTS first audio chunk after {time.time() - request_time:.2f}s")
+                self._count_download(len(chunk), new_request=not pcm)
+                pcm.extend(chunk)
+                yield chunk
+
+        if pcm and output_file:
+            self._archive_stream(text, voice_settings, bytes(pcm[:len(pcm) // 2 * 2]), output_file)
+
+    def _archive_stream(self, text, voice_settings, pcm, output_file):
+        archive_format = os.path.splitext(output_file)[1].lstrip(".")
+        try:
+            if archive_format == "opus":
+                encode_opus(pcm, OPENAI_TTS_STREAM_SAMPLE_RATE, output_file)
+            else:
+                write_wav(output_file, pcm, OPENAI_TTS_STREAM_SAMPLE_RATE)
+        except Exception as e:
+            print(f"Failed to archive streamed TTS: {e}")
+            return
+        print(f"TTS streamed: {output_file} ({len(pcm) / 2 / OPENAI_TTS_STREAM_SAMPLE_RATE:.1f}s, "
+              f"{len(pcm) // 1024} KB PCM -> {os.path.getsize(output_file) // 1024} KB stored)")
+        # The archive can stand in for a cached response when it is in the requested format
+        if self.cache is not None and archive_format == OPENAI_TTS_FORMAT:
+            with open(output_file, "rb") as f:
+                self.cache.put(self._cache_key(text, voice_settings), f.read(), text=text[:100])
+
+    def text_to_speech_with_callback(self, text: str, on_audio_starts: Optional[Callable] = None,
+                                     use_cache: bool = True, on_finish: Optional[Callable] = None) -> str:
         """
         Generate TTS and play it, calling callback when playback starts
         """
+        cached = self.get_cached_audio(text) if use_cache else None
+        if cached:
+            return self.play_audio_file(cached, on_audio_starts, on_finish)
+
+        if self.can_stream():
+            return self.stream_speech(text, on_audio_starts, on_finish)
+
         # Generate the audio file
-        audio_file = self.text_to_speech(text)
+        audio_file = self.text_to_speech(text, use_cache=False)
+        return self.play_audio_file(audio_file, on_audio_starts, on_finish)
+
+    def play_audio_file(self, audio_file: str, on_audio_starts: Optional[Callable] = None,
+                        on_finish: Optional[Callable] = None) -> str:
+        if self.player:
+            # Callback fires when the first frame is actually played
+            self.player.play_file(audio_file, on_start=on_audio_starts, on_finish=on_finish)
+            return audio_file
 
         # Call callback before starting playback (audio is ready)
         if on_audio_starts:
@@ -121,10 +318,6 @@ class OpenAITTSClient:
 
         # Play the audio file using system command (non-blocking)
         try:
-            import subprocess
-            from config import AUDIO_PLAY_COMMAND
-
-            # Play audio file in background (non-blocking)
             subprocess.Popen(AUDIO_PLAY_COMMAND + [audio_file])
             print(f"Started playing TTS audio: {audio_file}")
 
@@ -148,6 +341,10 @@ class OpenAITTSClient:
             "voice": OPENAI_TTS_VOICE if self.is_available() else "N/A",
             "speed": OPENAI_TTS_SPEED if self.is_available() else "N/A",
             "format": OPENAI_TTS_FORMAT if self.is_available() else "N/A",
+            "streaming": self.can_stream(),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "requests": self.requests,
+            "bytes_received": self.bytes_received,
             "api_key_set": bool(os.getenv("OPENAI_API_KEY")),
             "use_openai_tts": USE_OPENAI_TTS
         }
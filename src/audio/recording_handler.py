@@ -4,13 +4,18 @@ Audio Recording Handler for Terry the Tube
 import os
 import time
 import subprocess
+import threading
 import keyboard
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import (
     RECORDINGS_DIR, AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, MAX_RECORDING_TIME,
-    MIN_AUDIO_FILE_SIZE, AUDIO_RECORD_COMMAND, RECORDING_TOO_SMALL_ERROR
+    MIN_AUDIO_FILE_SIZE, AUDIO_RECORD_COMMAND, AUDIO_STREAM_COMMAND,
+    RECORDING_TOO_SMALL_ERROR, CAPTURE_BACKEND, CAPTURE_PREROLL_MS, UPLOAD_IDLE_TIMEOUT
 )
+from .audio_utils import write_wav, read_pcm_stream, pcm16_to_float32
+from .audio_capture import AudioCapture
+from .upload_decoder import UploadDecoder
 
 
 class RecordingHandler:
@@ -18,81 +23,228 @@ class RecordingHandler:
         self.recording_process = None
         self.current_recording = None
         self.session_folder = None
+        self._stream_reader = None
+        self._stream_buffer = None
+        self.capture = None
+        self.captured_audio = {}  # Recording filename -> samples captured in-process
+        self._capture_start = None
+        self._capture_listener = None
+        self.uploads = {}  # Upload id -> UploadDecoder for audio recorded in the browser
+        self._uploads_lock = threading.Lock()
+        self._upload_reaper = None
 
         # Ensure recordings directory exists
         if not os.path.exists(RECORDINGS_DIR):
             os.makedirs(RECORDINGS_DIR)
 
+        if CAPTURE_BACKEND == "stream":
+            self._open_capture_stream()
+
+    def _open_capture_stream(self):
+        if not AudioCapture.is_supported():
+            print("sounddevice not installed, recording with rec instead")
+            return
+        try:
+            self.capture = AudioCapture()
+            self.capture.start()
+        except Exception as e:
+            print(f"Could not open audio capture stream, recording with rec instead: {e}")
+            self.capture = None
+
     def set_session_folder(self, session_folder):
         self.session_folder = session_folder
 
-    def record_while_spacebar(self):
+    def record_while_spacebar(self, on_chunk=None):
         filename = self._generate_filename()
+        pressed = threading.Event()
+        released = threading.Event()
 
-        print("Press and hold SPACEBAR to record. Release to stop recording.")
+        def on_press(event):
+            # Key repeat fires this again while held; only the first press starts recording
+            if not pressed.is_set():
+                self._start_capture(filename, on_chunk)
+                pressed.set()
 
-        # Wait for spacebar to be pressed
-        while not keyboard.is_pressed('space'):
-            time.sleep(0.1)
+        def on_release(event):
+            if pressed.is_set():
+                released.set()
 
-        print("Recording... (release SPACEBAR to stop)")
+        print("Press and hold SPACEBAR to record. Release to stop recording.")
 
-        # Start recording
-        process = subprocess.Popen(
-            AUDIO_RECORD_COMMAND + [filename],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        hooks = [keyboard.on_press_key('space', on_press), keyboard.on_release_key('space', on_release)]
+        try:
+            # Wait for spacebar to be pressed
+            pressed.wait()
+            print("Recording... (release SPACEBAR to stop)")
 
-        # Record until spacebar is released or max time reached
-        start_time = time.time()
-        while keyboard.is_pressed('space'):
-            if time.time() - start_time > MAX_RECORDING_TIME:
+            # Record until spacebar is released or max time reached
+            if not released.wait(MAX_RECORDING_TIME):
                 print(f"Maximum recording time reached ({MAX_RECORDING_TIME} seconds)")
-                break
-            time.sleep(0.1)
+        finally:
+            for hook in hooks:
+                keyboard.unhook(hook)
 
         # Stop recording
-        process.terminate()
-        process.wait()
+        valid = self._stop_capture(filename)
 
         print("Recording finished.")
 
         # Validate recording
-        if self._is_valid_recording(filename):
+        if valid:
             return filename
         else:
             print(RECORDING_TOO_SMALL_ERROR)
             return None
 
-    def start_web_recording(self):
+    def start_web_recording(self, on_chunk=None):
         filename = self._generate_filename()
         self.current_recording = filename
 
-        # Start the recording process
-        self.recording_process = subprocess.Popen(
-            AUDIO_RECORD_COMMAND + [filename],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        # Start the recording
+        self._start_capture(filename, on_chunk)
 
         return filename
 
     def stop_web_recording(self):
-        if self.recording_process:
-            self.recording_process.terminate()
-            self.recording_process.wait()
-            self.recording_process = None
+        filename, self.current_recording = self.current_recording, None
 
         # Validate and return the recording
-        if self.current_recording and self._is_valid_recording(self.current_recording):
-            filename = self.current_recording
-            self.current_recording = None
+        if filename and self._stop_capture(filename):
             return filename
+        return None
+
+    def start_upload_recording(self, upload_id, on_chunk=None, on_expired=None):
+        """
+        Start decoding audio the browser records and uploads in chunks. An upload that gets no
+        chunk for UPLOAD_IDLE_TIMEOUT seconds is closed and on_expired() is called.
+        """
+        decoder = UploadDecoder(on_chunk, on_expired)
+        with self._uploads_lock:
+            previous = self.uploads.get(upload_id)
+            self.uploads[upload_id] = decoder
+            if self._upload_reaper is None:
+                self._upload_reaper = threading.Thread(target=self._reap_uploads, daemon=True)
+                self._upload_reaper.start()
+        if previous:
+            print(f"Upload {upload_id} restarted, discarding its earlier audio")
+            previous.abort()
+
+    def _reap_uploads(self):
+        # Closes uploads whose stop never arrives (tab closed, network dropped) so ffmpeg doesn't linger
+        while True:
+            time.sleep(1)
+            with self._uploads_lock:
+                expired = [(upload_id, decoder) for upload_id, decoder in self.uploads.items()
+                           if time.time() - decoder.last_activity > UPLOAD_IDLE_TIMEOUT]
+                for upload_id, _ in expired:
+                    del self.uploads[upload_id]
+            for upload_id, decoder in expired:
+                print(f"Upload {upload_id} got no audio for {UPLOAD_IDLE_TIMEOUT}s, closing it")
+                decoder.abort()
+                if decoder.on_expired:
+                    try:
+                        decoder.on_expired()
+                    except Exception as e:
+                        print(f"Error closing expired upload {upload_id}: {e}")
+
+    def add_upload_chunk(self, upload_id, data):
+        with self._uploads_lock:
+            decoder = self.uploads.get(upload_id)
+        if decoder:
+            decoder.feed(data)
         else:
-            self.current_recording = None
+            print(f"Dropping audio chunk for unknown upload {upload_id}")
+
+    def stop_upload_recording(self, upload_id):
+        with self._uploads_lock:
+            decoder = self.uploads.pop(upload_id, None)
+        if decoder is None:
             return None
 
+        pcm = decoder.finish()
+        if len(pcm) <= MIN_AUDIO_FILE_SIZE:
+            return None
+
+        filename = self._generate_filename()
+        self.captured_audio[filename] = pcm16_to_float32(pcm)
+        threading.Thread(target=write_wav, args=(filename, pcm)).start()
+        return filename
+
+    def pop_captured_audio(self, filename):
+        """Samples for a recording captured in-process, or None if it only exists as a file"""
+        return self.captured_audio.pop(filename, None)
+
+    def _start_capture(self, filename, on_chunk=None):
+        if self.capture:
+            # The stream is already running; a recording is just a start offset into the ring,
+            # moved back by the pre-roll so words spoken while pressing aren't lost
+            preroll_frames = int(self.capture.sample_rate * CAPTURE_PREROLL_MS / 1000)
+            self._capture_start = max(0, self.capture.mark() - preroll_frames)
+            self._capture_listener = on_chunk
+            if on_chunk:
+                self.capture.add_listener(on_chunk, backfill_from=self._capture_start)
+        else:
+            self._start_process(filename, on_chunk)
+
+    def _stop_capture(self, filename):
+        """Stop recording into filename; returns True if it holds enough audio to transcribe"""
+        if self.capture:
+            if self._capture_start is None:
+                return False
+            if self._capture_listener:
+                self.capture.remove_listener(self._capture_listener)
+                self._capture_listener = None
+            segment = self.capture.get_segment(self._capture_start)
+            self._capture_start = None
+            if len(segment) * 2 <= MIN_AUDIO_FILE_SIZE:
+                return False
+
+            # STT reads the segment straight from the ring; the WAV is only for the session archive
+            self.captured_audio[filename] = segment
+            threading.Thread(target=write_wav, args=(filename, segment)).start()
+            return True
+
+        if self.recording_process:
+            self._stop_process(filename)
+        return self._is_valid_recording(filename)
+
+    def _start_process(self, filename, on_chunk=None):
+        if on_chunk is None:
+            self.recording_process = subprocess.Popen(
+                AUDIO_RECORD_COMMAND + [filename],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            return
+
+        # Streaming: rec writes raw PCM to stdout so chunks can be transcribed while recording
+        self.recording_process = subprocess.Popen(
+            AUDIO_STREAM_COMMAND,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self._stream_buffer = bytearray()
+        self._stream_reader = threading.Thread(
+            target=read_pcm_stream,
+            args=(self.recording_process.stdout, self._stream_buffer, on_chunk),
+            daemon=True
+        )
+        self._stream_reader.start()
+
+    def _stop_process(self, filename):
+        self.recording_process.terminate()
+        self.recording_process.wait()
+        self.recording_process = None
+
+        if self._stream_reader:
+            # Drain what rec flushed on exit, then archive the raw stream as a WAV
+            self._stream_reader.join()
+            self._stream_reader = None
+            pcm = bytes(self._stream_buffer)
+            self._stream_buffer = None
+            if pcm:
+                write_wav(filename, pcm)
+
     def _generate_filename(self):
         timestamp = int(time.time())
 
@@ -109,7 +261,7 @@ class RecordingHandler:
                 os.path.getsize(filename) > MIN_AUDIO_FILE_SIZE)
 
     def is_recording(self):
-        return self.recording_process is not None
+        return self.recording_process is not None or self._capture_start is not None
 
     def cleanup_old_recordings(self):
         if os.path.exists(RECORDINGS_DIR):
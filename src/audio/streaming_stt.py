@@ -0,0 +1,121 @@
+"""
+Incremental Speech-to-Text for Terry the Tube
+Decodes audio in chunks while the user is still talking so only the tail is left at release
+"""
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import (
+    AUDIO_SAMPLE_RATE, STREAMING_STT_CHUNK_SECONDS, STREAMING_STT_SEARCH_SECONDS,
+    STT_TECHNICAL_ERROR
+)
+from .audio_utils import pcm16_to_float32
+
+FRAME_SAMPLES = AUDIO_SAMPLE_RATE // 50  # 20 ms analysis frames
+
+
+class StreamingTranscriber:
+    def __init__(self, stt_handler, on_partial=None, chunk_seconds=STREAMING_STT_CHUNK_SECONDS):
+        self.stt_handler = stt_handler
+        self.on_partial = on_partial
+        self.chunk_samples = int(chunk_seconds * AUDIO_SAMPLE_RATE)
+        self.search_samples = int(STREAMING_STT_SEARCH_SECONDS * AUDIO_SAMPLE_RATE)
+
+        self._chunks = []
+        self._pending = 0  # Samples received but not yet decoded
+        self._segments = []
+        self._failed = False
+        self._finishing = False
+        self._condition = threading.Condition()
+        self._partial_lock = threading.Lock()
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def feed(self, pcm_chunk):
+        """Queue a chunk of 16-bit PCM bytes (or float32 samples) for decoding"""
+        if isinstance(pcm_chunk, (bytes, bytearray, memoryview)):
+            pcm_chunk = pcm16_to_float32(pcm_chunk)
+        if len(pcm_chunk) == 0:
+            return
+        with self._condition:
+            self._chunks.append(pcm_chunk)
+            self._pending += len(pcm_chunk)
+            self._condition.notify()
+
+    def close_partials(self):
+        """Stop emitting partial transcripts (called when the user releases the button)"""
+        with self._partial_lock:
+            self.on_partial = None
+
+    def finish(self):
+        """
+        Decode whatever audio is left and return the full transcript
+        Returns None if any chunk failed so the caller can fall back to a full decode
+        """
+        self.close_partials()
+        with self._condition:
+            self._finishing = True
+            self._condition.notify()
+        self._worker.join()
+
+        if self._failed:
+            return None
+        return " ".join(self._segments).strip()
+
+    def cancel(self):
+        self.close_partials()
+        with self._condition:
+            self._chunks = []
+            self._pending = 0
+            self._finishing = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending < self.chunk_samples and not self._finishing:
+                    self._condition.wait()
+                if self._pending == 0 and self._finishing:
+                    return
+                audio = np.concatenate(self._chunks)
+                if self._finishing:
+                    cut = len(audio)
+                else:
+                    cut = self._find_cut(audio[:self.chunk_samples])
+                self._chunks = [audio[cut:]] if cut < len(audio) else []
+                self._pending = len(audio) - cut
+
+            text = self.stt_handler.speech_to_text(audio[:cut], use_cache=False)
+            if text == STT_TECHNICAL_ERROR:
+                self._failed = True
+                continue
+            if text:
+                self._segments.append(text)
+                self._emit_partial()
+
+    def _find_cut(self, window):
+        """Cut at the quietest 20 ms frame near the end of the window to avoid splitting words"""
+        tail = window[len(window) - self.search_samples:]
+        frames = len(tail) // FRAME_SAMPLES
+        if frames == 0:
+            return len(window)
+        energy = np.square(tail[:frames * FRAME_SAMPLES].reshape(frames, FRAME_SAMPLES)).mean(axis=1)
+        quietest = int(np.argmin(energy))
+        return len(window) - self.search_samples + (quietest + 1) * FRAME_SAMPLES
+
+    def _emit_partial(self):
+        with self._partial_lock:
+            if self.on_partial:
+                try:
+                    self.on_partial(" ".join(self._segments))
+                except Exception as e:
+                    print(f"Error delivering partial transcript: {e}")
@@ -4,60 +4,222 @@ Speech-to-Text Handler for Terry the Tube
 import os
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import (
-    WHISPER_MODEL, WHISPER_LANGUAGE, TRANSCRIPTS_DIR,
-    STT_ERROR_MESSAGE, STT_TECHNICAL_ERROR
+    WHISPER_MODEL, WHISPER_LANGUAGE, WHISPER_BACKEND, TRANSCRIPTS_DIR,
+    STT_ERROR_MESSAGE, STT_TECHNICAL_ERROR, VAD_ENABLED,
+    STT_WORKER_PROCESSES, STT_PRIORITY_LIVE, STT_RESULT_TIMEOUT,
+    STT_CACHE_ENABLED, STT_CACHE_DIR, STT_CACHE_MAX_ENTRIES, STT_CACHE_MAX_BYTES
 )
+from .audio_utils import np, load_wav_samples, pcm16_to_float32, write_wav
+from .vad import VoiceActivityDetector
+from .stt_scheduler import STTScheduler
+from utils.disk_cache import DiskCache
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+    print("Warning: openai-whisper package not installed, falling back to whisper CLI")
 
 
 class STTHandler:
-    def __init__(self):
+    def __init__(self, backend=WHISPER_BACKEND, preload=True, use_scheduler=True, use_cache=True,
+                 scheduler=None):
         self.model = WHISPER_MODEL
         self.language = WHISPER_LANGUAGE
+        self.backend = backend
+        self.whisper_model = None
+        self.scheduler = None
+        self._model_lock = threading.Lock()
+        self.vad = VoiceActivityDetector() if VAD_ENABLED and np is not None else None
+        self.vad_stats = {"clips": 0, "silent_clips": 0, "input_seconds": 0.0, "trimmed_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+        self.transcript_cache = None
+        if STT_CACHE_ENABLED and use_cache:
+            self.transcript_cache = DiskCache(
+                STT_CACHE_DIR, STT_CACHE_MAX_BYTES, STT_CACHE_MAX_ENTRIES, extension=".txt"
+            )
 
         # Ensure transcripts directory exists
         if not os.path.exists(TRANSCRIPTS_DIR):
             os.makedirs(TRANSCRIPTS_DIR)
 
-    def speech_to_text(self, audio_file):
+        if self.backend == "local" and whisper is None:
+            print("In-process Whisper unavailable, using whisper CLI")
+            self.backend = "cli"
+
+        if self.backend == "local" and use_scheduler and (scheduler or STT_WORKER_PROCESSES > 0):
+            # Decoding happens in warm worker processes; this process never loads the model
+            self.scheduler = scheduler or STTScheduler()
+            if preload:
+                self.scheduler.warm_up()
+        elif self.backend == "local" and preload:
+            self.load_model()
+
+    def load_model(self):
+        """Load the Whisper model once and keep it resident"""
+        with self._model_lock:
+            if self.whisper_model is None:
+                start_time = time.time()
+                self.whisper_model = whisper.load_model(self.model)
+                print(f"Whisper model '{self.model}' loaded in {time.time() - start_time:.2f}s")
+        return self.whisper_model
+
+    def speech_to_text(self, audio, priority=STT_PRIORITY_LIVE, use_cache=True):
+        """
+        Transcribe a WAV path or an in-memory buffer (float32 samples or 16-bit PCM bytes)
+        Returns "" for silent recordings and STT_TECHNICAL_ERROR on failure
+        """
         try:
-            # Get the base filename without path
-            base_filename = os.path.basename(audio_file)
-            base_name = os.path.splitext(base_filename)[0]
-
-            # Run Whisper transcription
-            result = subprocess.run(
-                ["whisper", audio_file, "--model", self.model, "--language", self.language,
-                 "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR],
-                capture_output=True,
-                text=True
-            )
+            samples = self._load_samples(audio)
 
-            # Read transcription result
-            txt_file = os.path.join(TRANSCRIPTS_DIR, f"{base_name}.txt")
-            if os.path.exists(txt_file):
-                with open(txt_file, 'r') as f:
-                    transcription = f.read().strip()
-                    if transcription:
-                        return transcription
+            cache_key = None
+            if self.transcript_cache and use_cache:
+                cache_key = self._cache_key(audio, samples)
+                cached = self.transcript_cache.get(cache_key)
+                if cached is not None:
+                    print("Transcript cache hit")
+                    return cached.decode("utf-8")
 
-            # Return empty string for silent/empty recordings (let bot handle silence)
-            return ""
+            if self.vad and samples is not None:
+                audio = self._apply_vad(samples)
+
+            if audio is None:
+                transcription = ""
+            elif self.scheduler:
+                job = self.scheduler.submit(audio, priority=priority)
+                try:
+                    transcription = job.result(timeout=STT_RESULT_TIMEOUT)
+                except FutureTimeout:
+                    job.cancel()  # Still queued jobs are dropped rather than decoded for nobody
+                    raise
+            else:
+                transcription = self.decode(audio)
+
+            if cache_key and transcription != STT_TECHNICAL_ERROR:
+                self.transcript_cache.put(cache_key, transcription.encode("utf-8"),
+                                          model=self.model, language=self.language)
+            return transcription
 
         except Exception as e:
             print(f"Error in speech recognition: {e}")
             return STT_TECHNICAL_ERROR
 
+    def _cache_key(self, audio, samples):
+        """Key on the decoded audio content so the same take hits regardless of file name"""
+        if samples is not None:
+            content = samples.tobytes()
+        else:
+            with open(audio, "rb") as f:
+                content = f.read()
+        return DiskCache.make_key(content, self.model, self.language)
+
+    def decode(self, audio):
+        """Run Whisper on audio in this process, skipping VAD and the worker pool"""
+        if self.backend == "local":
+            return self._transcribe_local(audio)
+        return self._transcribe_cli(audio)
+
+    def _load_samples(self, audio):
+        if isinstance(audio, (bytes, bytearray, memoryview)):
+            return pcm16_to_float32(audio)
+        if isinstance(audio, str):
+            samples = load_wav_samples(audio)
+            # Anything other than 16 kHz mono PCM goes through whisper's ffmpeg loader
+            if samples is None and whisper is not None:
+                samples = whisper.load_audio(audio)
+            return samples
+        return audio
+
+    def _apply_vad(self, samples):
+        """
+        Trim silence before decoding
+        Returns None for all-silent clips
+        """
+        trimmed, stats = self.vad.trim(samples)
+        with self._stats_lock:
+            self.vad_stats["clips"] += 1
+            self.vad_stats["silent_clips"] += int(stats["silent"])
+            self.vad_stats["input_seconds"] += stats["input_seconds"]
+            self.vad_stats["trimmed_seconds"] += stats["trimmed_seconds"]
+
+        if stats["silent"]:
+            print(f"VAD: {stats['input_seconds']:.2f}s clip is silent, skipping Whisper")
+        elif stats["trimmed_seconds"] > 0:
+            print(f"VAD: trimmed {stats['trimmed_seconds']:.2f}s of {stats['input_seconds']:.2f}s")
+        return trimmed
+
+    def get_vad_stats(self):
+        with self._stats_lock:
+            return dict(self.vad_stats, enabled=self.vad is not None)
+
+    def _transcribe_local(self, audio):
+        samples = self._load_samples(audio)
+        if len(samples) == 0:
+            return ""
+
+        model = self.whisper_model or self.load_model()
+        # The model is not safe to share between concurrent decodes
+        with self._model_lock:
+            result = model.transcribe(samples, language=self.language, fp16=False)
+        return result.get("text", "").strip()
+
+    def _transcribe_cli(self, audio):
+        if not isinstance(audio, str):
+            # The CLI can only read files, so spill the buffer next to its transcript
+            audio = write_wav(
+                os.path.join(TRANSCRIPTS_DIR, f"buffer_{int(time.time() * 1000)}.wav"),
+                self._load_samples(audio)
+            )
+
+        # Get the base filename without path
+        base_filename = os.path.basename(audio)
+        base_name = os.path.splitext(base_filename)[0]
+
+        # Run Whisper transcription
+        result = subprocess.run(
+            ["whisper", audio, "--model", self.model, "--language", self.language,
+             "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            # A failed decode isn't silence; an empty transcript would be cached and answered as one
+            raise RuntimeError(f"whisper exited with code {result.returncode}: {result.stderr.strip()[-200:]}")
+
+        # Read transcription result
+        txt_file = os.path.join(TRANSCRIPTS_DIR, f"{base_name}.txt")
+        if os.path.exists(txt_file):
+            with open(txt_file, 'r') as f:
+                transcription = f.read().strip()
+                if transcription:
+                    return transcription
+
+        # Return empty string for silent/empty recordings (let bot handle silence)
+        return ""
+
     def is_available(self):
+        if self.backend == "local":
+            return whisper is not None
         try:
             result = subprocess.run(["whisper", "--help"], capture_output=True)
             return result.returncode == 0
         except Exception:
             return False
 
+    def get_cache_stats(self):
+        return self.transcript_cache.get_stats() if self.transcript_cache else None
+
+    def get_scheduler_metrics(self):
+        return self.scheduler.get_metrics() if self.scheduler else None
+
     def get_model_info(self):
         return {
             "model": self.model,
-            "language": self.language
+            "language": self.language,
+            "backend": self.backend
         }
@@ -0,0 +1,208 @@
+"""
+STT Job Scheduler for Terry the Tube
+Runs Whisper in a fixed pool of warm worker processes behind a bounded priority queue
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from config import (
+    STT_WORKER_PROCESSES, STT_THREADS_PER_WORKER, STT_QUEUE_SIZE,
+    STT_QUEUE_TIMEOUT, STT_PRIORITY_LIVE
+)
+
+WAIT_SAMPLE_WINDOW = 100  # Recent jobs used for wait-time metrics
+
+# Per-process STT handler, created once by the pool initializer
+_worker_handler = None
+
+
+def _init_worker(threads_per_worker):
+    global _worker_handler
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+    from .stt_handler import STTHandler
+    _worker_handler = STTHandler(backend="local", preload=True, use_scheduler=False, use_cache=False)
+
+
+def _decode_job(audio):
+    return _worker_handler.decode(audio)
+
+
+def _ping_job():
+    return os.getpid()
+
+
+class STTQueueFull(Exception):
+    """Raised when the STT queue stays full for longer than the submit timeout"""
+
+
+class STTScheduler:
+    def __init__(self, workers=STT_WORKER_PROCESSES, max_queue=STT_QUEUE_SIZE,
+                 threads_per_worker=STT_THREADS_PER_WORKER):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.executor = self._create_pool()
+        self._queue = queue.PriorityQueue(maxsize=max_queue)
+        # Only hand the pool as many jobs as it has workers so queued jobs stay re-orderable
+        self._slots = threading.Semaphore(workers)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._recent_waits = deque(maxlen=WAIT_SAMPLE_WINDOW)
+        self.metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "pool_restarts": 0,
+            "max_wait_seconds": 0.0
+        }
+
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def _create_pool(self):
+        # Spawned, not forked: a fork would copy the parent's threads' locks (audio, HTTP, torch) mid-use
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,)
+        )
+
+    def _restart_pool(self, broken):
+        """Replace a pool whose worker died; every later submit to it would fail"""
+        with self._lock:
+            if self.executor is not broken:
+                return  # Another failed job already replaced it
+            self.executor = self._create_pool()
+            self.metrics["pool_restarts"] += 1
+        print("STT worker died, restarting the worker pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self):
+        """Start every worker process so the model is loaded before the first customer"""
+        start_time = time.time()
+        pings = [self.executor.submit(_ping_job) for _ in range(self.workers)]
+        pids = {ping.result() for ping in pings}
+        print(f"STT worker pool ready: {len(pids)} process(es) in {time.time() - start_time:.2f}s")
+
+    def submit(self, audio, priority=STT_PRIORITY_LIVE, callback=None, timeout=STT_QUEUE_TIMEOUT):
+        """
+        Queue audio for decoding; lower priority values run first
+        Returns a Future resolving to the transcript. Raises STTQueueFull on backpressure.
+        """
+        if self._closed:
+            raise RuntimeError("STT scheduler is shut down")
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+
+        try:
+            self._queue.put((priority, next(self._sequence), time.time(), audio, future), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.metrics["rejected"] += 1
+            raise STTQueueFull(f"STT queue full ({self._queue.maxsize} jobs waiting)")
+
+        with self._lock:
+            self.metrics["submitted"] += 1
+        return future
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            _, _, enqueued_at, audio, future = self._queue.get()
+            if future is None:
+                self._cancel_queued()  # Jobs from submits that were already waiting for space
+                return
+            if self._closed:
+                future.cancel()
+            if not future.set_running_or_notify_cancel():
+                self._slots.release()
+                continue
+
+            wait = time.time() - enqueued_at
+            with self._lock:
+                self._recent_waits.append(wait)
+                self.metrics["max_wait_seconds"] = max(self.metrics["max_wait_seconds"], wait)
+                self.metrics["in_flight"] += 1
+
+            executor = self.executor
+            try:
+                job = executor.submit(_decode_job, audio)
+            except Exception as e:
+                # A broken or shut-down pool: fail this job instead of the dispatcher thread
+                self._job_done(future, error=e)
+                if isinstance(e, BrokenProcessPool):
+                    self._restart_pool(executor)
+                continue
+            job.add_done_callback(
+                lambda done, target=future, pool=executor: self._finish_job(done, target, pool)
+            )
+
+    def _finish_job(self, job, future, executor):
+        if job.cancelled():
+            self._job_done(future, error=CancelledError("STT job cancelled"))
+            return
+        error = job.exception()
+        self._job_done(future, error=error, result=None if error else job.result())
+        if isinstance(error, BrokenProcessPool):
+            self._restart_pool(executor)
+
+    def _job_done(self, future, error=None, result=None):
+        self._slots.release()
+        with self._lock:
+            self.metrics["in_flight"] -= 1
+            self.metrics["failed" if error else "completed"] += 1
+        if error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def get_metrics(self):
+        with self._lock:
+            waits = list(self._recent_waits)
+            metrics = dict(self.metrics)
+        metrics["workers"] = self.workers
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["avg_wait_seconds"] = sum(waits) / len(waits) if waits else 0.0
+        return metrics
+
+    def shutdown(self):
+        """Cancel every queued job and stop the dispatcher without waiting for the queue to drain"""
+        self._closed = True
+        # The sentinel sorts ahead of any job that slips in, and the extra slot wakes a dispatcher
+        # waiting for a busy pool
+        while True:
+            self._cancel_queued()
+            try:
+                self._queue.put_nowait((float("-inf"), -1, 0, None, None))
+                break
+            except queue.Full:
+                continue  # A submit that was already waiting took the space
+        self._slots.release()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cancel_queued(self):
+        while True:
+            try:
+                _, _, _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None:
+                future.cancel()
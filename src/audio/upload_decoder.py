@@ -0,0 +1,65 @@
+"""
+Decoder for audio recorded in the browser and uploaded in chunks
+Pipes the compressed stream (WebM/Opus from MediaRecorder) through ffmpeg into 16 kHz PCM
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from config import AUDIO_DECODE_COMMAND
+from .audio_utils import read_pcm_stream
+
+
+class UploadDecoder:
+    def __init__(self, on_chunk=None, on_expired=None):
+        self.pcm = bytearray()
+        self.on_expired = on_expired  # Called if the upload is abandoned and closed for inactivity
+        self.last_activity = time.time()
+        self.process = subprocess.Popen(
+            AUDIO_DECODE_COMMAND,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        # Decoded audio flows out while chunks are still arriving, so streaming STT keeps up
+        self._reader = threading.Thread(
+            target=read_pcm_stream,
+            args=(self.process.stdout, self.pcm, on_chunk),
+            daemon=True
+        )
+        self._reader.start()
+        self._lock = threading.Lock()
+
+    def feed(self, data):
+        self.last_activity = time.time()
+        with self._lock:
+            try:
+                self.process.stdin.write(data)
+                self.process.stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                print(f"Audio decoder rejected chunk: {e}")
+
+    def finish(self):
+        """Close the input and return all decoded 16-bit PCM"""
+        with self._lock:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self._reader.join()
+        self.process.wait()
+        return bytes(self.pcm)
+
+    def abort(self):
+        """Kill ffmpeg and discard the audio of an upload that will never be finished"""
+        self.process.kill()
+        with self._lock:
+            try:
+                self.process.stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass
+        self._reader.join()
+        self.process.wait()
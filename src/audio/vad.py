@@ -0,0 +1,79 @@
+"""
+Energy-based Voice Activity Detection for Terry the Tube
+Trims leading/trailing silence and flags all-silent clips before they reach Whisper
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import (
+    AUDIO_SAMPLE_RATE, VAD_THRESHOLD_DBFS, VAD_NOISE_MARGIN_DB,
+    VAD_FRAME_MS, VAD_PADDING_MS, VAD_MIN_SPEECH_MS
+)
+
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate=AUDIO_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * VAD_FRAME_MS / 1000)
+        self.padding_frames = int(VAD_PADDING_MS / VAD_FRAME_MS)
+        self.min_speech_frames = max(1, int(VAD_MIN_SPEECH_MS / VAD_FRAME_MS))
+
+    def frame_levels(self, samples):
+        """RMS level of each frame in dBFS"""
+        frames = len(samples) // self.frame_samples
+        framed = samples[:frames * self.frame_samples].reshape(frames, self.frame_samples)
+        rms = np.sqrt(np.mean(np.square(framed, dtype=np.float64), axis=1))
+        return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+    def find_speech(self, samples):
+        """
+        Return (start_sample, end_sample) of the voiced region, or None if the clip is silent
+        """
+        levels = self.frame_levels(samples)
+        if len(levels) == 0:
+            return None
+
+        # Adapt to the room: speech must clear both the absolute gate and the noise floor by
+        # the margin. A clip whose loudest frame doesn't is steady noise, treated as silent.
+        noise_floor = np.percentile(levels, 10)
+        threshold = max(VAD_THRESHOLD_DBFS, noise_floor + VAD_NOISE_MARGIN_DB)
+        if levels.max() <= threshold:
+            return None
+        voiced = np.flatnonzero(levels > threshold)
+        if len(voiced) < self.min_speech_frames:
+            return None
+
+        first = max(0, voiced[0] - self.padding_frames)
+        last = min(len(levels), voiced[-1] + 1 + self.padding_frames)
+        end = len(samples) if last == len(levels) else last * self.frame_samples
+        return first * self.frame_samples, end
+
+    def trim(self, samples):
+        """
+        Trim silence around speech
+        Returns (trimmed_samples or None when silent, stats dict)
+        """
+        region = self.find_speech(samples)
+        input_seconds = len(samples) / float(self.sample_rate)
+
+        if region is None:
+            return None, {
+                "silent": True,
+                "input_seconds": input_seconds,
+                "trimmed_seconds": input_seconds
+            }
+
+        start, end = region
+        trimmed = samples[start:end]
+        return trimmed, {
+            "silent": False,
+            "input_seconds": input_seconds,
+            "trimmed_seconds": input_seconds - len(trimmed) / float(self.sample_rate)
+        }
@@ -2,21 +2,27 @@
 AI Language Model Handler for Terry the Tube
 Supports both OpenAI GPT and Ollama models
 """
-from langchain_ollama import OllamaLLM
 from langchain_core.prompts import ChatPromptTemplate
 import sys
 import os
+import threading
 import time
+from collections import deque
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import (
-    USE_OPENAI_CHAT, OLLAMA_MODEL, OLLAMA_TEMPERATURE, OLLAMA_TIMEOUT, DEFAULT_PERSONALITY
+    USE_OPENAI_CHAT, OLLAMA_MODEL, DEFAULT_PERSONALITY, LLM_HEDGING_ENABLED, LLM_HEDGE_TO_OPENAI,
+    LLM_MAX_TOKENS, BEER_DISPENSED_TRIGGER
 )
-from src.personalities import get_personality_by_key
+from src.personalities import get_personality_by_key, PERSONALITIES
 from src.audio.openai_chat_client import OpenAIChatClient
+from utils import ollama_connection
+from core.llm_router import LLMRouter, percentile
+from core.context_builder import ContextBuilder, count_tokens
 
 
 class AIHandler:
-    def __init__(self, personality_key=None):
+    def __init__(self, personality_key=None, openai_client=None, router=None):
+        """Pass openai_client/router to share them with another handler"""
         try:
             # Set personality first
             self.personality_key = personality_key or DEFAULT_PERSONALITY
@@ -26,34 +32,42 @@ class AIHandler:
 
             # Initialize AI clients
             self.use_openai = USE_OPENAI_CHAT
-            self.openai_client = None
-            self.ollama_model = None
-            self.ollama_chain = None
+            self.openai_client = openai_client
+            self.use_ollama = False
+            self.router = router or LLMRouter()
             self.last_generation_time = 0.0
+            # Built once so every request for this personality starts with identical bytes
+            self.system_prompt = self._build_system_prompt(self.personality_config["prompt_template"])
+            self.context_builder = ContextBuilder(self.system_prompt)
+            # Output cap; the exit line itself is caught as the response streams (_limit_response)
+            self.max_tokens = self.personality_config.get("max_tokens", LLM_MAX_TOKENS)
+            self.response_lengths = deque(maxlen=100)  # Output tokens of recent responses
+            self.generation_stats = {"responses": 0, "hit_max_tokens": 0, "early_stops": 0}
+            self._stats_lock = threading.Lock()
 
-            if self.use_openai:
+            # OpenAI is built as the primary, or only as Ollama's hedge if that is allowed
+            if self.use_openai or (LLM_HEDGING_ENABLED and LLM_HEDGE_TO_OPENAI):
                 try:
-                    self.openai_client = OpenAIChatClient()
+                    if self.openai_client is None:
+                        self.openai_client = OpenAIChatClient(enabled=True)
                     if self.openai_client.is_available():
-                        print(f"AI Handler initialized with OpenAI Chat")
-                    else:
+                        print(f"AI Handler initialized with OpenAI Chat{'' if self.use_openai else ' (hedge)'}")
+                    elif self.use_openai:
                         print("OpenAI Chat not available, falling back to Ollama")
                         self.use_openai = False
                 except Exception as e:
                     print(f"Failed to initialize OpenAI Chat: {e}")
-                    print("Falling back to Ollama")
+                    if self.use_openai:
+                        print("Falling back to Ollama")
                     self.use_openai = False
 
-            # Initialize Ollama as fallback or primary
-            if not self.use_openai or not (self.openai_client and self.openai_client.is_available()):
-                self.ollama_model = OllamaLLM(
-                    model=OLLAMA_MODEL,
-                    temperature=OLLAMA_TEMPERATURE,
-                    timeout=OLLAMA_TIMEOUT
-                )
+            # Initialize Ollama as fallback or primary, and as the hedge when OpenAI is primary
+            if not self.use_openai or LLM_HEDGING_ENABLED:
+                # Streamed by ollama_connection rather than a LangChain LLM so a request that
+                # lost the hedge race can be dropped before its first token
                 self.prompt = ChatPromptTemplate.from_template(self.personality_config["prompt_template"])
-                self.ollama_chain = self.prompt | self.ollama_model
-                print(f"AI Handler initialized with Ollama model: {OLLAMA_MODEL}")
+                self.use_ollama = True
+                print(f"AI Handler initialized with Ollama model: {OLLAMA_MODEL}{' (hedge)' if self.use_openai else ''}")
 
             print(f"Personality: {self.personality_config['name']}")
         except Exception as e:
@@ -62,43 +76,129 @@ class AIHandler:
                 print("Please make sure Ollama is running and the model is available")
             raise
 
-    def generate_gpt_response(self, context, start_time):
-        system_prompt = self.personality_config["prompt_template"].replace("{context}", "")
-        response, _ = self.openai_client.generate_response(
-            system_prompt=system_prompt,
-            user_message=context
+    def _build_system_prompt(self, prompt_template):
+        # History is sent as role messages after this prefix instead of inside it
+        lines = [line for line in prompt_template.split("\n") if "{context}" not in line]
+        return "\n".join(lines)
+
+    def _question_note(self, question_count):
+        note = f"CURRENT QUESTION NUMBER: {question_count} (out of 3 maximum)"
+        if question_count >= 3:
+            note += "\nYou've already asked 3 questions."
+        return note
+
+    def _build_messages(self, conversation_history, question_count):
+        # The per-turn note goes last so it never disturbs the cached prefix
+        return list(conversation_history) + [{"role": "system", "content": self._question_note(question_count)}]
+
+    def _build_context(self, conversation_history, question_count):
+        # Ollama takes the history flattened into the prompt template
+        labels = {"user": "Human", "assistant": "AI", "system": "Note"}
+        context = "\n".join(f"{labels[message['role']]}: {message['content']}" for message in conversation_history)
+        context += f"\n\n{self._question_note(question_count)}"
+        return context
+
+    def _backends(self, conversation_history, question_count, record_stats=True):
+        """Chat backends for this turn, primary first, for the router"""
+        # Both backends get the same history, trimmed to the token budget
+        conversation_history = self.context_builder.build(
+            conversation_history, self._question_note(question_count), record=record_stats
         )
-        self.last_generation_time = time.time() - start_time
-        print(f"Response generated in {self.last_generation_time:.2f}s")
-        return response.strip()
+        backends = {}
+        if self.openai_client and self.openai_client.is_available():
+            messages = self._build_messages(conversation_history, question_count)
+            backends["openai"] = lambda on_open: self.openai_client.generate_response_stream(
+                system_prompt=self.system_prompt,
+                conversation_history=messages,
+                max_tokens=self.max_tokens,
+                on_open=on_open
+            )
+        if self.use_ollama:
+            prompt = self.prompt.format(context=self._build_context(conversation_history, question_count))
+            backends["ollama"] = lambda on_open: ollama_connection.stream_generate(
+                prompt, num_predict=self.max_tokens, on_open=on_open
+            )
+        if not self.use_openai and "ollama" in backends:
+            backends = dict(sorted(backends.items(), key=lambda item: item[0] != "ollama"))
+        return backends
 
-    def generate_response(self, conversation_history, question_count=1):
+    def _limit_response(self, chunks, record_stats=True):
+        """
+        Pass chunks through, ending the response as soon as the beer trigger and then the exit
+        line have been produced. This is done here rather than with a backend stop sequence,
+        which would also fire on an exit line that comes before the beer.
+        """
+        exit_string = self.get_exit_string()
+        text = ""
+        beer_at = -1
         try:
-            start_time = time.time()
+            for chunk in chunks:
+                text += chunk
+                if beer_at < 0:
+                    beer_at = text.find(BEER_DISPENSED_TRIGGER)
+                exit_at = text.find(exit_string, beer_at + len(BEER_DISPENSED_TRIGGER)) if beer_at >= 0 else -1
+                if exit_at >= 0:
+                    # Anything after the goodbye is rambling nobody needs to hear or pay for
+                    end = exit_at + len(exit_string)
+                    yield chunk[:len(chunk) - (len(text) - end)]
+                    text = text[:end]
+                    if record_stats:
+                        with self._stats_lock:
+                            self.generation_stats["early_stops"] += 1
+                    return
 
-            # Prepare context with question count information
-            context = "\n".join(conversation_history)
-            context += f"\n\nCURRENT QUESTION NUMBER: {question_count} (out of 3 maximum)"
-            if question_count >= 3:
-                context += "\nYou've already asked 3 questions."
+                yield chunk
+        finally:
+            chunks.close()  # Stops the backend if we finished early
+            if record_stats:
+                self._record_length(text)
 
-            # Use OpenAI if available and enabled
-            if self.use_openai and self.openai_client and self.openai_client.is_available():
-                return self.generate_gpt_response(context, start_time)
+    def _record_length(self, text):
+        tokens = count_tokens(text)
+        with self._stats_lock:
+            self.response_lengths.append(tokens)
+            self.generation_stats["responses"] += 1
+            if tokens >= self.max_tokens:
+                self.generation_stats["hit_max_tokens"] += 1
+        print(f"Response length: {tokens} tokens, {len(text)} chars (limit {self.max_tokens} tokens)")
 
-            # Fall back to Ollama
-            elif self.ollama_chain:
-                response = self.ollama_chain.invoke({"context": context})
+    def generate_response(self, conversation_history, question_count=1, record_stats=True):
+        """record_stats=False keeps background generations out of the live latency and length stats"""
+        try:
+            start_time = time.time()
+            response = "".join(self.generate_response_stream(conversation_history, question_count, record_stats))
+            if record_stats:
                 self.last_generation_time = time.time() - start_time
                 print(f"Response generated in {self.last_generation_time:.2f}s")
-                return response.strip()
-
-            else:
-                raise Exception("No AI model available")
+            return response.strip()
         except Exception as e:
             print(f"Error generating response: {e}")
             raise
 
+    def generate_response_stream(self, conversation_history, question_count=1, record_stats=True, cancel=None):
+        """
+        Yield the response as text chunks while the model is still generating. Setting the
+        cancel event drops the request and ends the stream early, even before the first token.
+        """
+        start_time = time.time()
+        backends = self._backends(conversation_history, question_count, record_stats)
+        chunks = self._limit_response(self.router.stream(backends, record=record_stats, cancel=cancel), record_stats)
+
+        first_token_time = None
+        try:
+            for chunk in chunks:
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                yield chunk
+        finally:
+            chunks.close()  # A consumer that stops early stops the backend too
+
+        if not record_stats:
+            return
+        self.last_generation_time = time.time() - start_time
+        print(f"Response streamed in {self.last_generation_time:.2f}s "
+              f"(first token after {first_token_time or 0.0:.2f}s)")
+
     def get_last_generation_time(self):
         """Get the time it took to generate the last response"""
         return self.last_generation_time
@@ -107,13 +207,30 @@ class AIHandler:
         try:
             if self.use_openai and self.openai_client and self.openai_client.is_available():
                 return self.openai_client.test_connection()
-            elif self.ollama_chain:
-                test_response = self.ollama_chain.invoke({"context": "Test message"})
-                return True
+            elif self.use_ollama:
+                return ollama_connection.is_model_available()
             return False
         except Exception:
             return False
 
+    def uses_ollama(self):
+        return self.use_ollama
+
+    def get_routing_stats(self):
+        return self.router.get_stats()
+
+    def get_context_stats(self):
+        return self.context_builder.get_stats()
+
+    def get_generation_stats(self):
+        with self._stats_lock:
+            lengths = list(self.response_lengths)
+            stats = dict(self.generation_stats)
+        stats["max_tokens"] = self.max_tokens
+        stats["average_tokens"] = sum(lengths) / len(lengths) if lengths else None
+        stats["p95_tokens"] = percentile(lengths, 0.95)
+        return stats
+
     def get_personality_info(self):
         return {
             "key": self.personality_key,
@@ -126,3 +243,32 @@ class AIHandler:
 
     def get_exit_string(self):
         return self.personality_config["exit_string"]
+
+
+
+class AIHandlerRegistry:
+    """One AIHandler per personality, built at startup on shared model clients"""
+
+    def __init__(self, default_key=None):
+        start_time = time.time()
+        default_key = default_key or DEFAULT_PERSONALITY
+        # The first handler creates the clients; the rest only compile their prompts
+        first = AIHandler(personality_key=default_key)
+        self.handlers = {default_key: first}
+        for key in PERSONALITIES:
+            if key not in self.handlers:
+                self.handlers[key] = AIHandler(
+                    personality_key=key,
+                    openai_client=first.openai_client,
+                    router=first.router
+                )
+        print(f"Built {len(self.handlers)} personality handlers in {time.time() - start_time:.2f}s")
+
+    def get(self, personality_key):
+        handler = self.handlers.get(personality_key)
+        if handler is None:
+            raise ValueError(f"Unknown personality: {personality_key}")
+        return handler
+
+    def keys(self):
+        return list(self.handlers)
@@ -0,0 +1,120 @@
+"""
+Context Builder for Terry the Tube
+Keeps each turn's prompt inside a token budget: the newest messages are sent verbatim and
+older ones are condensed into a short note, so a long or silence-filled conversation can't
+keep growing the prompt
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from config import (
+    OPENAI_CHAT_MODEL, CONTEXT_TOKEN_BUDGET, CONTEXT_MIN_RECENT_MESSAGES, CONTEXT_SUMMARY_CHARS,
+    CONTEXT_SUMMARY_TOKENS
+)
+
+MESSAGE_OVERHEAD = 4  # Tokens each chat message costs beyond its text (role and separators)
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.encoding_for_model(OPENAI_CHAT_MODEL)
+            except Exception:
+                try:
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    print(f"Tokenizer unavailable, estimating tokens from length: {e}")
+    return _encoding
+
+
+def count_tokens(text):
+    """Token count for text; about four characters per token when tiktoken isn't available"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+class ContextBuilder:
+    def __init__(self, system_prompt, budget=CONTEXT_TOKEN_BUDGET):
+        # The system prompt never changes for a personality, so it is measured once
+        self.system_tokens = count_tokens(system_prompt)
+        self.budget = budget
+        self.last_build = None
+
+    def build(self, conversation_history, note, record=True):
+        """
+        Return the history messages to send with this turn's note. Messages that don't fit are
+        replaced by a condensed system message at the front. record=False leaves last_build alone.
+        """
+        note_tokens = count_tokens(note) + MESSAGE_OVERHEAD
+        available = self.budget - self.system_tokens - note_tokens
+        costs = [count_tokens(message["content"]) + MESSAGE_OVERHEAD for message in conversation_history]
+        # When history has to be cut, part of the budget goes to the condensed note
+        verbatim_room = available - CONTEXT_SUMMARY_TOKENS if sum(costs) > available else available
+
+        # Keep the newest messages that fit, and never fewer than the minimum
+        kept_count = 0
+        used = 0
+        for cost in reversed(costs):
+            if kept_count >= CONTEXT_MIN_RECENT_MESSAGES and used + cost > verbatim_room:
+                break
+            used += cost
+            kept_count += 1
+        split = len(conversation_history) - kept_count
+        messages = list(conversation_history[split:])
+
+        if split:
+            summary = self._condense(conversation_history[:split], available - used)
+            messages.insert(0, {"role": "system", "content": summary})
+            used += count_tokens(summary) + MESSAGE_OVERHEAD
+
+        total = self.system_tokens + used + note_tokens
+        if not record:
+            return messages
+        self.last_build = {
+            "prompt_tokens": total,
+            "system_tokens": self.system_tokens,
+            "history_tokens": used,
+            "messages_sent": kept_count,
+            "messages_condensed": split
+        }
+        print(f"Context: {total}/{self.budget} tokens (system {self.system_tokens}, history {used}"
+              f"{f', {split} older message(s) condensed' if split else ''})")
+        return messages
+
+    def _condense(self, messages, room):
+        header = f"Earlier in this conversation ({len(messages)} messages, condensed):"
+        room -= count_tokens(header) + MESSAGE_OVERHEAD
+        lines = []
+        # Work back from the most recent so the lines closest to the kept history survive
+        for message in reversed(messages):
+            content = " ".join(message["content"].split())
+            if len(content) > CONTEXT_SUMMARY_CHARS:
+                content = content[:CONTEXT_SUMMARY_CHARS].rstrip() + "…"
+            if message["role"] == "user":
+                line = f"- Customer: {content or '(silence)'}"
+            else:
+                line = f"- You: {content}"
+            cost = count_tokens(line) + 1
+            if cost > room:
+                break
+            room -= cost
+            lines.append(line)
+        return "\n".join([header] + lines[::-1])
+
+    def get_stats(self):
+        return dict(self.last_build) if self.last_build else None
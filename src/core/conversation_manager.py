@@ -9,14 +9,17 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import (
     BEER_DISPENSED_TRIGGER, 
-    BEER_DISPENSED_MESSAGE, CONVERSATION_ENDED_MESSAGE, RECORDINGS_DIR
+    BEER_DISPENSED_MESSAGE, CONVERSATION_ENDED_MESSAGE, RECORDINGS_DIR,
+    PIPELINED_TURNS, RECOVERY_MESSAGE, STT_TECHNICAL_ERROR
 )
 from utils.display import display
+from core.speech_pipeline import SpeechPipeline
 
 
 class ConversationManager:
-    def __init__(self, ai_handler, audio_handler, web_interface=None, text_only_mode=False):
+    def __init__(self, ai_handler, audio_handler, web_interface=None, text_only_mode=False, silence_bank=None):
         self.ai_handler = ai_handler
+        self.silence_bank = silence_bank
         self.audio_handler = audio_handler
         self.web_interface = web_interface
         self.text_only_mode = text_only_mode
@@ -30,8 +33,16 @@ class ConversationManager:
         # Set personality for audio handler
         if hasattr(self.audio_handler, 'set_personality') and hasattr(self.ai_handler, 'personality_key'):
             self.audio_handler.set_personality(self.ai_handler.personality_key)
+        
+        # Follow the audio player so the web status tracks when Terry actually stops talking
+        if hasattr(self.audio_handler, 'set_playback_listener'):
+            self.audio_handler.set_playback_listener(self._on_playback_changed)
     
     def start_conversation(self):
+        # A new customer or personality shouldn't hear the tail of the last conversation
+        if hasattr(self.audio_handler, 'stop_playback'):
+            self.audio_handler.stop_playback()
+        
         self.conversation_history = []
         self.beer_dispensed = False
         self.conversation_active = True
@@ -67,7 +78,7 @@ class ConversationManager:
             self._create_session_folder()
     
     def add_user_message(self, message):
-        self.conversation_history.append(f"Human: {message}")
+        self.conversation_history.append({"role": "user", "content": message})
         
         # Ensure session is prepared (this will be a no-op if already done)
         self.prepare_session_if_needed()
@@ -91,6 +102,10 @@ class ConversationManager:
             return
         
         try:
+            # Keep the model free for this customer while their response is generated
+            if self.silence_bank:
+                self.silence_bank.pause()
+            
             # Show question progress (increment first since we're about to ask the next question)
             display.conversation_question(self.question_count, total=3)
             display.thinking()
@@ -100,30 +115,25 @@ class ConversationManager:
                 self.web_interface.set_generating_response(True)
                 self.web_interface.set_status("Generating response...")
             
-            response = self.ai_handler.generate_response(self.conversation_history, self.question_count)
-            self.conversation_history.append(f"AI: {response}")
+            pipeline = None
+            streamed = False
+            banked_response = self._take_banked_response()
+            if banked_response is not None:
+                display.info("Answering silence from the response bank")
+                response = banked_response
+            elif self.text_only_mode:
+                response = self._stream_text_response()
+                streamed = True
+            elif PIPELINED_TURNS:
+                response, pipeline = self._stream_and_speak_response()
+                streamed = True
+            else:
+                response = self.ai_handler.generate_response(self.conversation_history, self.question_count)
+            self.conversation_history.append({"role": "assistant", "content": response})
             self.question_count += 1
             
-            # Clean response of asterisks
-            cleaned_response = response.replace("*", "")
-            
-            display.bot_response(cleaned_response, question_num=self.question_count)
-            
-            # Handle web interface message display with loading spinner
-            message_index = None
-            if self.web_interface:
-                # First, add the hidden message before changing any states
-                message_index = self.web_interface.add_pending_message("Terry", cleaned_response, is_ai=True)
-                
-                # Then transition directly from generating response to generating audio to prevent flash
-                self.web_interface.set_generating_audio(True)
-                self.web_interface.set_generating_response(False) 
-                self.web_interface.set_status("Generating voice...")
-            
-            display.speaking()
-            
-            # Generate and play TTS audio with callback to show message
-            self._generate_and_play_tts(cleaned_response, message_index)
+            if not streamed:
+                self._show_and_speak(response)
             
             # Handle beer dispensing
             if BEER_DISPENSED_TRIGGER in response and not self.beer_dispensed:
@@ -133,6 +143,11 @@ class ConversationManager:
             exit_string = self.ai_handler.get_exit_string()
             # Make exit string detection more precise - only trigger at the END of response
             if response.strip().endswith(exit_string):
+                # Let the goodbye finish before the conversation resets
+                if pipeline:
+                    pipeline.wait()
+                if hasattr(self.audio_handler, 'wait_until_quiet'):
+                    self.audio_handler.wait_until_quiet()
                 self.end_conversation()
                 
         except Exception as e:
@@ -141,6 +156,111 @@ class ConversationManager:
                 self.web_interface.set_generating_response(False)
             display.error(f"Error generating response: {e}")
             self.handle_error_recovery()
+        finally:
+            if self.silence_bank:
+                self.silence_bank.resume()
+    
+    def _take_banked_response(self):
+        """A ready-made reply if the customer said nothing (or couldn't be transcribed)"""
+        if not self.silence_bank or not self.conversation_history:
+            return None
+        last_message = self.conversation_history[-1]
+        if last_message["role"] != "user" or last_message["content"].strip() not in ("", STT_TECHNICAL_ERROR):
+            return None
+        return self.silence_bank.take(self.ai_handler.personality_key, self.question_count)
+    
+    def _show_and_speak(self, response):
+        """Show and voice a response that is already complete"""
+        # Clean response of asterisks
+        cleaned_response = response.replace("*", "")
+        
+        display.bot_response(cleaned_response, question_num=self.question_count)
+        
+        # Handle web interface message display with loading spinner
+        message_index = None
+        if self.web_interface:
+            # First, add the hidden message before changing any states
+            message_index = self.web_interface.add_pending_message("Terry", cleaned_response, is_ai=True)
+            
+            # Then transition directly from generating response to generating audio to prevent flash
+            self.web_interface.set_generating_audio(True)
+            self.web_interface.set_generating_response(False) 
+            self.web_interface.set_status("Generating voice...")
+        
+        display.speaking()
+        
+        # Generate and play TTS audio with callback to show message
+        self._generate_and_play_tts(cleaned_response, message_index)
+    
+    def _stream_and_speak_response(self):
+        """Speak the response sentence by sentence while the LLM is still generating it"""
+        message_index = None
+        
+        def on_segment_starts(index, spoken_text):
+            nonlocal message_index
+            if not self.web_interface:
+                return
+            if message_index is None:
+                # Reveal the message with the first sentence, then grow it as each one plays
+                message_index = self.web_interface.add_message("Terry", spoken_text, is_ai=True)
+                self.web_interface.set_generating_response(False)
+                self.web_interface.set_generating_audio(False)
+                self.web_interface.set_status("Speaking...")
+            else:
+                self.web_interface.update_message(message_index, spoken_text)
+        
+        display.speaking()
+        pipeline = SpeechPipeline(self.audio_handler, on_segment_starts)
+        response = pipeline.run(self._echo_tokens(
+            self.ai_handler.generate_response_stream(self.conversation_history, self.question_count)
+        ))
+        if self.web_interface and not response.replace("*", "").strip():
+            # Nothing to speak means on_segment_starts never fires to clear the spinner
+            self.web_interface.set_generating_response(False)
+            self.web_interface.set_generating_audio(False)
+            self.web_interface.set_status("Ready to serve beer!")
+        return response, pipeline
+    
+    def _stream_text_response(self):
+        """Text-only turn: grow the web message and the terminal line as tokens arrive"""
+        message_index = None
+        response = ""
+        for chunk in self._echo_tokens(
+            self.ai_handler.generate_response_stream(self.conversation_history, self.question_count)
+        ):
+            response += chunk
+            if not self.web_interface:
+                continue
+            cleaned_response = response.replace("*", "")
+            if message_index is None:
+                message_index = self.web_interface.add_message("Terry", cleaned_response, is_ai=True)
+                self.web_interface.set_generating_response(False)
+            else:
+                self.web_interface.update_message(message_index, cleaned_response)
+        
+        if self.web_interface:
+            self.web_interface.set_generating_response(False)
+            self.web_interface.set_status("Ready to serve beer!")
+        return response
+    
+    def _echo_tokens(self, chunks):
+        """Pass generated tokens through while printing them to the terminal as they arrive"""
+        started = False
+        try:
+            for chunk in chunks:
+                # Start the line on the first token so backend log lines don't land inside it
+                if not started:
+                    display.bot_response_start(question_num=self.question_count + 1)
+                    started = True
+                display.bot_response_token(chunk.replace("*", ""))
+                yield chunk
+        finally:
+            if started:
+                display.bot_response_end()
+    
+    def _on_playback_changed(self, playing):
+        if self.web_interface:
+            self.web_interface.set_speaking(playing)
     
     def dispense_beer(self):
         self.beer_dispensed = True
@@ -207,7 +327,7 @@ class ConversationManager:
     def _restart_conversation_with_recovery(self):
         display.warning("Restarting conversation...")
         
-        recovery_message = "Sorry about that. Let's start over. You looking for a beer or what?"
+        recovery_message = RECOVERY_MESSAGE
         display.bot_response(recovery_message)
         
         # Handle recovery message with loading spinner
@@ -0,0 +1,329 @@
+"""
+LLM Router for Terry the Tube
+Sends each turn to the healthiest chat backend and, if it hasn't produced a first token
+by its deadline, races the other backend against it and keeps whichever answers first.
+Tracks rolling first-token latency per backend for the hedge deadline and for monitoring.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from config import (
+    LLM_HEDGING_ENABLED, LLM_HEDGE_DEADLINE, LLM_HEDGE_MIN_DELAY, LLM_LATENCY_WINDOW,
+    LLM_LATENCY_SLO, LLM_LATENCY_MAX_AGE, LLM_BACKEND_FAILURE_LIMIT, LLM_BACKEND_COOLDOWN
+)
+
+CANCEL_POLL_SECONDS = 0.1  # How often a cancel event is checked while waiting on the backends
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class BackendStats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = deque(maxlen=LLM_LATENCY_WINDOW)  # (recorded at, seconds to first token)
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.consecutive_losses = 0  # Races lost to the hedge in a row
+        self.demoted_until = 0.0
+
+    def add_latency(self, seconds):
+        self.latencies.append((time.time(), seconds))
+
+    def recent_latencies(self):
+        # Old samples age out so a backend demoted for being slow gets tried again later
+        cutoff = time.time() - LLM_LATENCY_MAX_AGE
+        return [seconds for recorded_at, seconds in self.latencies if recorded_at >= cutoff]
+
+    def p50(self):
+        return percentile(self.recent_latencies(), 0.5)
+
+    def p95(self):
+        return percentile(self.recent_latencies(), 0.95)
+
+    def is_healthy(self):
+        if time.time() < self.demoted_until:
+            return False
+        p50 = self.p50()
+        return p50 is None or p50 <= LLM_LATENCY_SLO
+
+    def to_dict(self):
+        return {
+            "healthy": self.is_healthy(),
+            "p50_first_token_seconds": self.p50(),
+            "p95_first_token_seconds": self.p95(),
+            "samples": len(self.recent_latencies()),
+            "requests": self.requests,
+            "wins": self.wins,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "consecutive_losses": self.consecutive_losses
+        }
+
+
+class _Attempt:
+    """One backend's stream, pumped into the router's event queue from its own thread"""
+
+    def __init__(self, name, start_stream, events):
+        self.name = name
+        self.started_at = time.time()
+        self.first_token_at = None
+        self.failed = False
+        self.cancelled = False
+        self._abort = None  # Drops the backend's HTTP request, once it has one
+        self._abort_lock = threading.Lock()
+        self._start_stream = start_stream
+        self._events = events
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _on_open(self, abort):
+        with self._abort_lock:
+            self._abort = abort
+            cancelled = self.cancelled
+        if cancelled:
+            abort()
+
+    def cancel(self):
+        """Stop this attempt now, even while it is still waiting for its first token"""
+        with self._abort_lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            abort = self._abort
+        if abort:
+            abort()
+
+    def _run(self):
+        chunks = None
+        try:
+            chunks = self._start_stream(self._on_open)
+            for chunk in chunks:
+                if self.cancelled:
+                    break
+                if chunk:
+                    if self.first_token_at is None:
+                        self.first_token_at = time.time()
+                    self._events.put((self, "chunk", chunk))
+            with self._abort_lock:
+                self._abort = None  # Finished: its connection may already be serving another request
+            self._events.put((self, "done", None))
+        except Exception as e:
+            if self.cancelled:
+                return  # The error is the dropped connection
+            self.failed = True
+            self._events.put((self, "error", e))
+        finally:
+            # Closing the generator drops the HTTP stream, which stops the backend generating
+            if chunks is not None and hasattr(chunks, "close"):
+                try:
+                    chunks.close()
+                except Exception:
+                    pass
+
+
+class LLMRouter:
+    def __init__(self, hedging=LLM_HEDGING_ENABLED):
+        self.hedging = hedging
+        self.backends = {}  # name -> BackendStats
+        self.decisions = deque(maxlen=20)  # Recent routing decisions, newest last
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def _stats(self, name):
+        if name not in self.backends:
+            self.backends[name] = BackendStats(name)
+        return self.backends[name]
+
+    def _order(self, names):
+        # Keep the configured preference, but let a healthy backend go ahead of an unhealthy one
+        with self._lock:
+            return sorted(names, key=lambda name: not self._stats(name).is_healthy())
+
+    def _hedge_delay(self, name):
+        with self._lock:
+            p95 = self._stats(name).p95()
+        if p95 is None:
+            return LLM_HEDGE_DEADLINE
+        return min(max(p95, LLM_HEDGE_MIN_DELAY), LLM_HEDGE_DEADLINE)
+
+    def _record_success(self, attempt):
+        with self._lock:
+            stats = self._stats(attempt.name)
+            # Measured from when this backend was asked, not from when the turn started
+            stats.add_latency(time.time() - attempt.started_at)
+            stats.wins += 1
+            stats.consecutive_failures = 0
+            stats.consecutive_losses = 0
+
+    def _record_loss(self, attempt):
+        """A backend that lost the race still gets a sample, or a slow primary would never look slow"""
+        if attempt.failed:
+            return
+        # Its first-token time if one arrived, otherwise how long it had been waiting: a lower bound
+        first_token_at = attempt.first_token_at or time.time()
+        with self._lock:
+            stats = self._stats(attempt.name)
+            stats.add_latency(first_token_at - attempt.started_at)
+            # Waiting samples are capped by the hedge deadline, so repeated losses demote it too;
+            # once the cooldown ends it is tried first again, which probes whether it recovered
+            stats.consecutive_losses += 1
+            if stats.consecutive_losses >= LLM_BACKEND_FAILURE_LIMIT:
+                stats.demoted_until = time.time() + LLM_BACKEND_COOLDOWN
+                stats.consecutive_losses = 0
+
+    def _record_failure(self, name, error):
+        print(f"LLM backend {name} failed: {error}")
+        with self._lock:
+            stats = self._stats(name)
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= LLM_BACKEND_FAILURE_LIMIT:
+                stats.demoted_until = time.time() + LLM_BACKEND_COOLDOWN
+
+    def stream(self, backends, record=True, cancel=None):
+        """
+        backends: {name: callable(on_open) returning a chunk iterator}, in order of preference.
+        The callable passes on_open a function that aborts its request, so a losing backend
+        is cut off at once instead of holding its connection until it times out.
+        Yields the chunks of whichever backend produces a first token first.
+        record=False routes the same way but leaves the latency stats and decision log alone.
+        Setting the cancel event aborts every request and ends the stream, first token or not.
+        """
+        order = self._order(list(backends))
+        if not order:
+            raise Exception("No AI model available")
+        if cancel is not None and cancel.is_set():
+            return
+        start_time = time.time()
+        events = queue.Queue()
+        attempts = []
+        remaining = list(order)
+        hedged = False
+
+        def next_event(deadline=None):
+            # Raises queue.Empty at the deadline; wakes up regularly while there is a cancel to watch
+            while True:
+                if cancel is not None and cancel.is_set():
+                    return None, "cancelled", None
+                timeout = None if deadline is None else max(deadline - time.time(), 0)
+                if cancel is not None:
+                    timeout = CANCEL_POLL_SECONDS if timeout is None else min(timeout, CANCEL_POLL_SECONDS)
+                try:
+                    return events.get(timeout=timeout)
+                except queue.Empty:
+                    if deadline is not None and time.time() >= deadline:
+                        raise
+
+        def start_next():
+            name = remaining.pop(0)
+            if record:
+                with self._lock:
+                    self._stats(name).requests += 1
+            attempts.append(_Attempt(name, backends[name], events))
+
+        start_next()
+        hedge_at = start_time + self._hedge_delay(order[0]) if self.hedging and remaining else None
+
+        winner = None
+        first_chunk = None
+        failed = []
+        try:
+            while winner is None:
+                try:
+                    attempt, kind, payload = next_event(hedge_at)
+                except queue.Empty:
+                    # The primary is past its deadline: race the next backend against it
+                    if record:
+                        print(f"No first token from {order[0]} after {time.time() - start_time:.2f}s, "
+                              f"hedging with {remaining[0]}")
+                    hedged = True
+                    start_next()
+                    hedge_at = None
+                    continue
+
+                if kind == "cancelled":
+                    return
+                if kind == "error":
+                    failed.append(attempt)
+                    if record:
+                        self._record_failure(attempt.name, payload)
+                    if remaining and (self.hedging or len(failed) == len(attempts)):
+                        # Don't wait out the deadline for a backend that has already failed
+                        hedged = hedged or len(attempts) > len(failed)
+                        start_next()
+                        hedge_at = None
+                    elif len(failed) == len(attempts):
+                        raise payload
+                    continue
+
+                winner = attempt
+                first_chunk = payload if kind == "chunk" else None
+
+            first_token_seconds = time.time() - start_time
+            if record:
+                self._record_success(winner)
+                self._record_decision(order[0], winner.name, hedged, first_token_seconds)
+            for attempt in attempts:
+                if attempt is not winner:
+                    if record:
+                        self._record_loss(attempt)
+                    attempt.cancel()
+
+            if first_chunk is None:
+                return
+            yield first_chunk
+            while True:
+                attempt, kind, payload = next_event()
+                if kind == "cancelled":
+                    return
+                if attempt is not winner:
+                    continue
+                if kind == "chunk":
+                    yield payload
+                elif kind == "done":
+                    return
+                else:
+                    raise payload
+        finally:
+            # Also reached when the consumer stops early
+            for attempt in attempts:
+                attempt.cancel()
+
+    def _record_decision(self, primary, winner, hedged, first_token_seconds):
+        with self._lock:
+            if hedged:
+                self.hedged_requests += 1
+                if winner != primary:
+                    self.hedge_wins += 1
+            self.decisions.append({
+                "time": time.time(),
+                "primary": primary,
+                "winner": winner,
+                "hedged": hedged,
+                "first_token_seconds": first_token_seconds
+            })
+        if hedged or winner != primary:
+            print(f"LLM routing: {winner} answered first ({first_token_seconds:.2f}s, primary {primary}, "
+                  f"hedged={hedged})")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "hedging": self.hedging,
+                "backends": {name: stats.to_dict() for name, stats in self.backends.items()},
+                "hedged_requests": self.hedged_requests,
+                "hedge_wins": self.hedge_wins,
+                "recent_decisions": list(self.decisions)
+            }
@@ -0,0 +1,198 @@
+"""
+Silence Response Bank for Terry the Tube
+Keeps a few pre-generated replies to silence ready for every personality and question
+number, with their audio already in the TTS cache, so an empty or failed transcription
+is answered instantly instead of waiting on the model. The bank is saved to disk, so a
+restart only generates what was used up.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import deque
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from config import SILENCE_BANK_SIZE, SILENCE_BANK_MAX_QUESTION, SILENCE_BANK_FILE
+from utils.disk_cache import DiskCache
+
+
+class SilenceResponseBank:
+    def __init__(self, ai_handlers, audio_handler=None, size=SILENCE_BANK_SIZE, path=SILENCE_BANK_FILE):
+        self.ai_handlers = ai_handlers
+        self.audio_handler = audio_handler  # None in text-only mode: nothing to render
+        self.size = size
+        self.path = path
+        self.responses = {}  # (personality_key, question_count) -> deque of ready responses
+        self.stats = {"generated": 0, "served": 0, "misses": 0, "failed": 0, "cancelled": 0, "loaded": 0}
+        self._lock = threading.Lock()
+        self._pending = deque()  # Keys waiting for a new response, most urgent first
+        self._wake = threading.Condition(self._lock)
+        self._resumed = threading.Event()  # Cleared while a customer's turn is generating
+        self._resumed.set()
+        self._cancel = None  # Cancel event of the generation in progress
+        self._dirty = False  # Responses changed since the bank was last saved
+        self._load()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def fill(self, first_personality=None):
+        """Queue the whole bank for generation, starting with the personality in use"""
+        keys = self.ai_handlers.keys()
+        if first_personality in keys:
+            keys.remove(first_personality)
+            keys.insert(0, first_personality)
+        with self._lock:
+            for personality_key in keys:
+                for question_count in range(SILENCE_BANK_MAX_QUESTION + 1):
+                    key = (personality_key, question_count)
+                    ready = len(self.responses.get(key, ()))
+                    self._pending.extend([key] * max(self.size - ready - self._pending.count(key), 0))
+            self._wake.notify()
+
+    def take(self, personality_key, question_count):
+        """Pop a ready response, or None if there isn't one; a replacement is generated in the background"""
+        key = (personality_key, question_count)
+        with self._lock:
+            ready = self.responses.get(key)
+            if not ready:
+                self.stats["misses"] += 1
+                return None
+            response = ready.popleft()
+            self.stats["served"] += 1
+            self._dirty = True
+            # Refill ahead of anything else so the next silence in this spot gets a fresh line
+            self._pending.appendleft(key)
+            self._wake.notify()
+        return response
+
+    def pause(self):
+        """
+        Hold off background generation while a customer's own response is being generated; one
+        already running is dropped, even before its first token, and queued again
+        """
+        with self._lock:
+            self._resumed.clear()
+            if self._cancel is not None:
+                self._cancel.set()
+
+    def resume(self):
+        self._resumed.set()
+
+    def _run(self):
+        self._prerender_loaded()
+        while True:
+            with self._lock:
+                while not self._pending and not self._dirty:
+                    self._wake.wait()
+            self._save()
+            self._resumed.wait()
+            with self._lock:
+                if not self._pending:
+                    continue
+                key = self._pending.popleft()
+            self._generate(*key)
+
+    def _generate(self, personality_key, question_count):
+        key = (personality_key, question_count)
+        cancel = threading.Event()
+        with self._lock:
+            # pause() may have come in since _run waited: don't start at all
+            if not self._resumed.is_set():
+                self._pending.appendleft(key)
+                return
+            self._cancel = cancel
+        try:
+            handler = self.ai_handlers.get(personality_key)
+            # Exactly what a silent turn looks like to the model: an empty customer message,
+            # kept out of the live turn's routing, context and length stats
+            response = "".join(handler.generate_response_stream(
+                [{"role": "user", "content": ""}], question_count, record_stats=False, cancel=cancel
+            )).strip()
+            if cancel.is_set():
+                # A customer turn started: the backend is theirs, try again later
+                with self._lock:
+                    self._pending.appendleft(key)
+                    self.stats["cancelled"] += 1
+                return
+            if not response:
+                return
+            if self.audio_handler:
+                self.audio_handler.prerender([(personality_key, response.replace("*", ""))])
+        except Exception as e:
+            with self._lock:
+                self.stats["failed"] += 1
+            print(f"Silence response generation failed for {personality_key} Q{question_count}: {e}")
+            return
+        finally:
+            with self._lock:
+                self._cancel = None
+
+        with self._lock:
+            self.responses.setdefault(key, deque()).append(response)
+            self.stats["generated"] += 1
+            self._dirty = True
+
+    def _prompt_key(self, personality_key):
+        # Saved responses are only reused while the personality's prompt is unchanged
+        handler = self.ai_handlers.get(personality_key)
+        return DiskCache.make_key(handler.personality_config["prompt_template"], handler.get_exit_string())
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Silence bank {self.path} unreadable, starting empty: {e}")
+            return
+
+        keys = self.ai_handlers.keys()
+        for personality_key, entry in saved.items():
+            if personality_key not in keys or entry.get("prompt") != self._prompt_key(personality_key):
+                continue
+            for question_count, responses in entry.get("responses", {}).items():
+                ready = deque(responses[:self.size])
+                self.responses[(personality_key, int(question_count))] = ready
+                self.stats["loaded"] += len(ready)
+        if self.stats["loaded"]:
+            print(f"Silence bank: loaded {self.stats['loaded']} saved response(s)")
+
+    def _save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            saved = {}
+            for (personality_key, question_count), ready in self.responses.items():
+                if personality_key not in saved:
+                    saved[personality_key] = {"prompt": self._prompt_key(personality_key), "responses": {}}
+                saved[personality_key]["responses"][str(question_count)] = list(ready)
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save silence bank: {e}")
+
+    def _prerender_loaded(self):
+        """Make sure saved responses still have their audio; already cached phrases cost nothing"""
+        if not self.audio_handler:
+            return
+        with self._lock:
+            phrases = [(personality_key, response.replace("*", ""))
+                       for (personality_key, _), ready in self.responses.items() for response in ready]
+        if phrases:
+            self.audio_handler.prerender(phrases)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["ready"] = sum(len(ready) for ready in self.responses.values())
+            stats["pending"] = len(self._pending)
+        return stats
@@ -0,0 +1,112 @@
+"""
+Sentence Pipeline for Terry the Tube
+Splits a streamed LLM response at sentence boundaries, synthesizes each sentence as soon as
+it is complete and plays the segments in order while later ones are still being generated
+"""
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from config import PIPELINE_TTS_WORKERS, PIPELINE_MIN_SENTENCE_CHARS
+
+SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+|\n+')
+
+
+def split_sentences(text, min_chars=PIPELINE_MIN_SENTENCE_CHARS):
+    """Split off complete sentences; returns (sentences, unfinished remainder)"""
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        candidate = text[start:match.end()].strip()
+        if len(candidate) >= min_chars:
+            sentences.append(candidate)
+            start = match.end()
+    return sentences, text[start:]
+
+
+class SpeechPipeline:
+    def __init__(self, audio_handler, on_segment_starts=None, workers=PIPELINE_TTS_WORKERS):
+        """
+        on_segment_starts(index, spoken_text) is called as each segment begins playing, with
+        all text spoken so far, so the UI can reveal the response in step with the audio
+        """
+        self.audio_handler = audio_handler
+        self.on_segment_starts = on_segment_starts
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._segments = queue.Queue()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._player = threading.Thread(target=self._play, daemon=True)
+        self.start_time = None
+        self.time_to_first_audio = None
+
+    def run(self, chunks):
+        """
+        Consume streamed text chunks. Returns the full response once generation has finished;
+        synthesis and playback of the remaining segments carry on in the background.
+        """
+        self.start_time = time.time()
+        self._player.start()
+        response = []
+        pending = ""
+        try:
+            for chunk in chunks:
+                response.append(chunk)
+                sentences, pending = split_sentences(pending + chunk)
+                for sentence in sentences:
+                    self._submit(sentence)
+            self._submit(pending)
+        except Exception:
+            self.cancel()
+            raise
+        finally:
+            self._segments.put(None)
+            self.executor.shutdown(wait=False)
+        return "".join(response)
+
+    def _submit(self, text):
+        text = text.replace("*", "").strip()
+        if text:
+            self._segments.put((text, self.executor.submit(self.audio_handler.synthesize_segment, text)))
+
+    def _play(self):
+        spoken = []
+        try:
+            while True:
+                item = self._segments.get()
+                if item is None or self._cancelled.is_set():
+                    break
+                text, future = item
+                try:
+                    audio_file = future.result()
+                except Exception as e:
+                    print(f"Segment synthesis failed: {e}")
+                    audio_file = None
+                if self._cancelled.is_set():
+                    break
+
+                if self.time_to_first_audio is None:
+                    self.time_to_first_audio = time.time() - self.start_time
+                    print(f"Time to first audio: {self.time_to_first_audio:.2f}s")
+                spoken.append(text)
+                if self.on_segment_starts:
+                    try:
+                        self.on_segment_starts(len(spoken) - 1, " ".join(spoken))
+                    except Exception as e:
+                        print(f"Error in segment start callback: {e}")
+                self.audio_handler.play_segment(text, audio_file)
+        finally:
+            self._done.set()
+
+    def cancel(self):
+        """Drop segments that haven't started playing yet"""
+        self._cancelled.set()
+
+    def wait(self, timeout=None):
+        """Block until the last segment has finished playing"""
+        return self._done.wait(timeout)
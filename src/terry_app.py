@@ -6,20 +6,26 @@ import os
 import sys
 import threading
 import warnings
-from core.ai_handler import AIHandler
+from core.ai_handler import AIHandlerRegistry
 from core.conversation_manager import ConversationManager
+from core.silence_responses import SilenceResponseBank
 from audio.audio_manager import AudioManager
 from web.web_interface import WebInterface
 from web.web_server import start_web_server
 from utils.cleanup import FileCleanup
 from utils.display import display
+from utils.openai_connection import start_keepalive, get_connection_stats
+from utils.ollama_connection import start_residency, get_ollama_stats
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from config import (
     STT_ERROR_MESSAGE, STT_TECHNICAL_ERROR, 
     TRANSCRIPTION_FAILED_ERROR, RECORDING_FAILED_WEB_ERROR,
-    ENABLE_TEXT_CHAT, TEXT_CHAT_ONLY
+    ENABLE_TEXT_CHAT, TEXT_CHAT_ONLY, TTS_PRERENDER_AT_BOOT, RECOVERY_MESSAGE,
+    USE_OPENAI_CHAT, USE_OPENAI_TTS, OPENAI_WARMUP_AT_BOOT, OLLAMA_PRELOAD_AT_BOOT,
+    DEFAULT_PERSONALITY, SILENCE_BANK_ENABLED, LLM_HEDGING_ENABLED, LLM_HEDGE_TO_OPENAI
 )
+from src.personalities import PERSONALITIES
 
 # Filter out TTS/Whisper warnings
 warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
@@ -34,7 +40,10 @@ class TerryTubeApp:
         self.text_only_mode = text_only_mode
         self.web_interface = None
         self.recording_in_progress = False
+        self.turn_in_progress = False
+        self.active_upload_id = None  # Browser upload currently being recorded, if any
         self.current_audio_file = None
+        self.live_message_index = None  # Web message showing partial transcripts while recording
         
         # Initialize components
         self._initialize_components()
@@ -57,13 +66,35 @@ class TerryTubeApp:
         try:
             display.section("Initializing Components")
             
+            # Open the shared OpenAI connection while the local models load
+            if USE_OPENAI_CHAT or (LLM_HEDGING_ENABLED and LLM_HEDGE_TO_OPENAI) or (USE_OPENAI_TTS and not TEXT_CHAT_ONLY):
+                start_keepalive(warm=OPENAI_WARMUP_AT_BOOT)
+            
             # Initialize audio manager
             display.component_init("Audio Manager")
             self.audio_manager = AudioManager()
+            if TTS_PRERENDER_AT_BOOT and not TEXT_CHAT_ONLY:
+                self.audio_manager.prerender_in_background(self._boot_phrases())
             
-            # Initialize AI handler with personality
+            # Build a handler for every personality up front so switching is instant
             display.component_init("AI Handler")
-            self.ai_handler = AIHandler(personality_key=self.personality_key)
+            self.ai_handlers = AIHandlerRegistry(default_key=self.personality_key)
+            self.ai_handler = self.ai_handlers.get(self.personality_key or DEFAULT_PERSONALITY)
+            if not TEXT_CHAT_ONLY:
+                self.audio_manager.preload_voices_in_background(self.ai_handlers.keys())
+            if self.ai_handler.uses_ollama():
+                # Blocks until the model is in memory so the first customer never waits on a cold load
+                start_residency(preload=OLLAMA_PRELOAD_AT_BOOT)
+            
+            # Pre-generate replies to silence in the background
+            self.silence_bank = None
+            if SILENCE_BANK_ENABLED:
+                display.component_init("Silence Response Bank")
+                self.silence_bank = SilenceResponseBank(
+                    self.ai_handlers,
+                    None if TEXT_CHAT_ONLY else self.audio_manager
+                )
+                self.silence_bank.fill(first_personality=self.ai_handler.personality_key)
             
             # Initialize conversation manager
             display.component_init("Conversation Manager")
@@ -71,7 +102,8 @@ class TerryTubeApp:
                 self.ai_handler, 
                 self.audio_manager,
                 self.web_interface,
-                text_only_mode=TEXT_CHAT_ONLY
+                text_only_mode=TEXT_CHAT_ONLY,
+                silence_bank=self.silence_bank
             )
             
             display.success("All components initialized successfully!")
@@ -80,6 +112,14 @@ class TerryTubeApp:
             display.error(f"Error initializing components: {e}")
             raise
     
+    def _boot_phrases(self):
+        """Lines every personality speaks verbatim, worth having in the TTS cache before anyone walks up"""
+        phrases = []
+        for key, personality in PERSONALITIES.items():
+            phrases.append((key, personality["greeting"]))
+            phrases.append((key, RECOVERY_MESSAGE))
+        return phrases
+    
     def handle_web_action(self, action, data=None):
         """Handle actions from the web interface"""
         if action == 'start_recording':
@@ -92,6 +132,14 @@ class TerryTubeApp:
         elif action == 'change_personality':
             if data and 'personality' in data:
                 self.change_personality(data['personality'])
+        elif action == 'start_upload':
+            if data and 'upload_id' in data:
+                self.start_upload_recording(data['upload_id'])
+        elif action == 'upload_chunk':
+            self.audio_manager.add_upload_chunk(data['upload_id'], data['chunk'])
+        elif action == 'stop_upload':
+            if data and 'upload_id' in data:
+                self.stop_upload_recording(data['upload_id'])
     
     def start_recording(self):
         """Start recording audio"""
@@ -102,9 +150,13 @@ class TerryTubeApp:
             self.conversation_manager.prepare_session_if_needed()
             
             if self.use_web_gui:
-                self.current_audio_file = self.audio_manager.start_web_recording()
+                self.current_audio_file = self.audio_manager.start_web_recording(
+                    on_partial=self._show_partial_transcript
+                )
             else:
-                self.current_audio_file = self.audio_manager.record_while_spacebar()
+                self.current_audio_file = self.audio_manager.record_while_spacebar(
+                    on_partial=display.partial_transcript
+                )
     
     def stop_recording(self):
         """Stop recording and process the audio"""
@@ -113,18 +165,66 @@ class TerryTubeApp:
             
             if self.use_web_gui:
                 audio_file = self.audio_manager.stop_web_recording()
+                live_message_index, self.live_message_index = self.live_message_index, None
                 if audio_file:
                     threading.Thread(
                         target=self.process_user_input, 
-                        args=(audio_file,), 
+                        args=(audio_file, live_message_index), 
                         daemon=True
                     ).start()
                 else:
+                    if live_message_index is not None:
+                        self.web_interface.update_message(live_message_index, "silence")
                     self._set_status(RECORDING_FAILED_WEB_ERROR)
             else:
                 if self.current_audio_file:
                     self.process_user_input(self.current_audio_file)
     
+    def start_upload_recording(self, upload_id):
+        """Start receiving audio recorded by the browser"""
+        # One customer at a time: a second tab can't start over a recording or a turn in progress
+        if self.recording_in_progress or self.turn_in_progress:
+            display.warning(f"Ignoring upload {upload_id}: a recording or turn is already in progress")
+            return
+        self.recording_in_progress = True
+        self.active_upload_id = upload_id
+        self.conversation_manager.prepare_session_if_needed()
+        self.audio_manager.start_upload_recording(
+            upload_id,
+            on_partial=self._show_partial_transcript,
+            on_expired=lambda: self._upload_expired(upload_id)
+        )
+    
+    def _upload_expired(self, upload_id):
+        """The browser stopped sending audio without finishing the upload"""
+        if self.active_upload_id != upload_id:
+            return
+        self.active_upload_id = None
+        self.recording_in_progress = False
+        live_message_index, self.live_message_index = self.live_message_index, None
+        if live_message_index is not None:
+            self.web_interface.update_message(live_message_index, "silence")
+        self._set_status(RECORDING_FAILED_WEB_ERROR)
+    
+    def stop_upload_recording(self, upload_id):
+        """Finish a browser upload and process it like a local recording"""
+        if self.active_upload_id != upload_id:
+            return  # Rejected at start, or already closed for inactivity
+        self.active_upload_id = None
+        self.recording_in_progress = False
+        audio_file = self.audio_manager.stop_upload_recording(upload_id)
+        live_message_index, self.live_message_index = self.live_message_index, None
+        if audio_file:
+            threading.Thread(
+                target=self.process_user_input,
+                args=(audio_file, live_message_index),
+                daemon=True
+            ).start()
+        else:
+            if live_message_index is not None:
+                self.web_interface.update_message(live_message_index, "silence")
+            self._set_status(RECORDING_FAILED_WEB_ERROR)
+    
     def process_text_message(self, text_message):
         """Process user input from text message"""
         if not text_message.strip():
@@ -141,8 +241,24 @@ class TerryTubeApp:
         
         threading.Thread(target=process_bot_response, daemon=True).start()
     
-    def process_user_input(self, audio_file):
+    def _show_partial_transcript(self, partial_text):
+        """Show the transcript so far as a live "You" message while the user is still talking"""
+        if not self.web_interface:
+            return
+        if self.live_message_index is None:
+            self.live_message_index = self.web_interface.add_message("You", partial_text, is_ai=False)
+        else:
+            self.web_interface.update_message(self.live_message_index, partial_text)
+    
+    def process_user_input(self, audio_file, live_message_index=None):
         """Process user input from audio file"""
+        self.turn_in_progress = True
+        try:
+            self._process_user_input(audio_file, live_message_index)
+        finally:
+            self.turn_in_progress = False
+    
+    def _process_user_input(self, audio_file, live_message_index):
         self._set_status("Transcribing your speech...")
         
         display.transcribing()
@@ -156,8 +272,11 @@ class TerryTubeApp:
         else:
             display_message = user_input
             display.user_input(user_input)
-            
-        self._add_message("You", display_message, is_ai=False)
+        
+        if live_message_index is not None and self.web_interface:
+            self.web_interface.update_message(live_message_index, display_message)
+        else:
+            self._add_message("You", display_message, is_ai=False)
         
         # Handle technical transcription errors (but allow empty strings for silence)
         if user_input == STT_TECHNICAL_ERROR:
@@ -185,8 +304,9 @@ class TerryTubeApp:
             self.conversation_manager.web_interface = self.web_interface
             
             # Only start conversation if personality was explicitly selected (via CLI or user selection)
+            # Run it alongside the server so the page is reachable while the greeting is voiced
             if self.web_interface.is_personality_selected():
-                self.conversation_manager.start_conversation()
+                threading.Thread(target=self.conversation_manager.start_conversation, daemon=True).start()
             
             # Start web server (blocking)
             display.info(f"Web interface started at: http://localhost:8080")
@@ -216,7 +336,9 @@ class TerryTubeApp:
                 display.separator()
                 display.recording_start()
                 
-                audio_file = self.audio_manager.record_while_spacebar()
+                audio_file = self.audio_manager.record_while_spacebar(
+                    on_partial=display.partial_transcript
+                )
                 
                 if audio_file:
                     display.recording_stop()
@@ -248,8 +370,8 @@ class TerryTubeApp:
     def change_personality(self, personality_key):
         """Change the AI personality"""
         try:
-            # Reinitialize AI handler with new personality
-            self.ai_handler = AIHandler(personality_key=personality_key)
+            # Switch to the prebuilt handler for this personality
+            self.ai_handler = self.ai_handlers.get(personality_key)
             
             # Update conversation manager with new AI handler
             self.conversation_manager.ai_handler = self.ai_handler
@@ -291,5 +413,11 @@ class TerryTubeApp:
             "audio": audio_info,
             "ai_available": ai_available,
             "web_mode": self.use_web_gui,
-            "personality": personality_info
+            "personality": personality_info,
+            "openai_connections": get_connection_stats(),
+            "ollama": get_ollama_stats() if self.ai_handler.uses_ollama() else None,
+            "silence_bank": self.silence_bank.get_stats() if self.silence_bank else None,
+            "llm_routing": self.ai_handler.get_routing_stats(),
+            "last_context": self.ai_handler.get_context_stats(),
+            "generation": self.ai_handler.get_generation_stats()
         }
\ No newline at end of file
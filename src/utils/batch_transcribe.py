@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Batch transcription for Terry the Tube session archives
+Transcribes every recordings/<session>/input_*.wav across all cores and writes one
+transcripts.json per session. Re-running skips files that are already transcribed.
+"""
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import (
+    RECORDINGS_DIR, BATCH_TRANSCRIPT_FILE, STT_PRIORITY_BATCH, STT_TECHNICAL_ERROR,
+    WHISPER_MODEL, WHISPER_LANGUAGE
+)
+from audio.stt_handler import STTHandler
+from audio.stt_scheduler import STTScheduler
+from utils.display import display
+
+
+def _audio_seconds(path):
+    try:
+        with wave.open(path, 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError):
+        return 0.0
+
+
+class BatchTranscriber:
+    def __init__(self, recordings_dir=RECORDINGS_DIR, workers=None):
+        self.recordings_dir = recordings_dir
+        self.workers = workers or os.cpu_count() or 1
+        self._session_locks = {}
+
+        # One single-threaded Whisper process per core; VAD and the cache run in this process
+        scheduler = STTScheduler(workers=self.workers, max_queue=self.workers * 2, threads_per_worker=1)
+        self.stt_handler = STTHandler(scheduler=scheduler)
+
+    def find_pending(self):
+        """Return {session_folder: [wav paths not yet in its transcript file]}"""
+        pending = {}
+        for session in sorted(os.listdir(self.recordings_dir)):
+            session_folder = os.path.join(self.recordings_dir, session)
+            if not os.path.isdir(session_folder):
+                continue
+            done = self._load_results(session_folder)["files"]
+            todo = [path for path in sorted(glob.glob(os.path.join(session_folder, "input_*.wav")))
+                    if os.path.basename(path) not in done]
+            if todo:
+                pending[session_folder] = todo
+        return pending
+
+    def run(self):
+        pending = self.find_pending()
+        jobs = [(session, path) for session, paths in pending.items() for path in paths]
+        if not jobs:
+            display.info("All recordings already transcribed")
+            return {"files": 0, "failed": 0, "audio_seconds": 0.0, "elapsed_seconds": 0.0}
+
+        display.info(f"Transcribing {len(jobs)} file(s) from {len(pending)} session(s) "
+                     f"with {self.workers} worker(s)")
+        self._session_locks = {session: threading.Lock() for session in pending}
+
+        start_time = time.time()
+        completed = 0
+        failed = 0
+        audio_total = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers * 2) as pool:
+            futures = {pool.submit(self._transcribe, session, path): path for session, path in jobs}
+            for future in as_completed(futures):
+                try:
+                    audio_seconds = future.result()
+                    error = ""
+                except Exception as e:
+                    # One bad file (full queue, unreadable WAV, transcript write error) must not end the run
+                    audio_seconds = None
+                    error = f": {e}"
+                if audio_seconds is None:
+                    failed += 1
+                    display.warning(f"Failed: {futures[future]}{error} (will retry on next run)")
+                    continue
+                completed += 1
+                audio_total += audio_seconds
+                elapsed = time.time() - start_time
+                display.info(f"[{completed + failed}/{len(jobs)}] {futures[future]} "
+                             f"({completed / elapsed:.2f} files/s)")
+
+        elapsed = time.time() - start_time
+        summary = {
+            "files": completed,
+            "failed": failed,
+            "audio_seconds": audio_total,
+            "elapsed_seconds": elapsed,
+            "files_per_second": completed / elapsed if elapsed else 0.0,
+            "real_time_factor": elapsed / audio_total if audio_total else 0.0
+        }
+        display.success(f"Transcribed {completed} file(s) ({audio_total:.1f}s of audio) in {elapsed:.1f}s: "
+                        f"{summary['files_per_second']:.2f} files/s, RTF {summary['real_time_factor']:.3f}")
+        return summary
+
+    def _transcribe(self, session_folder, path):
+        start_time = time.time()
+        text = self.stt_handler.speech_to_text(path, priority=STT_PRIORITY_BATCH)
+        if text == STT_TECHNICAL_ERROR:
+            return None
+
+        audio_seconds = _audio_seconds(path)
+        with self._session_locks[session_folder]:
+            results = self._load_results(session_folder)
+            results["files"][os.path.basename(path)] = {
+                "text": text,
+                "audio_seconds": round(audio_seconds, 3),
+                "decode_seconds": round(time.time() - start_time, 3),
+                "transcribed_at": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self._save_results(session_folder, results)
+        return audio_seconds
+
+    def _load_results(self, session_folder):
+        path = os.path.join(session_folder, BATCH_TRANSCRIPT_FILE)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+        return {
+            "session": os.path.basename(session_folder),
+            "model": WHISPER_MODEL,
+            "language": WHISPER_LANGUAGE,
+            "files": {}
+        }
+
+    def _save_results(self, session_folder, results):
+        # Write-then-rename so an interrupted run never leaves a truncated file behind
+        path = os.path.join(session_folder, BATCH_TRANSCRIPT_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def batch_transcribe(recordings_dir=RECORDINGS_DIR, workers=None):
+    display.header("Batch Transcription")
+    return BatchTranscriber(recordings_dir, workers).run()
+
+
+if __name__ == "__main__":
+    batch_transcribe(*sys.argv[1:2])
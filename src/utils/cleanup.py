@@ -3,7 +3,10 @@ import glob
 import shutil
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from config import RECORDINGS_DIR, TRANSCRIPTS_DIR, TRANSCRIPT_EXTENSIONS
+from config import (
+    RECORDINGS_DIR, TRANSCRIPTS_DIR, TRANSCRIPT_EXTENSIONS, AUDIO_DIR,
+    AUDIO_RETENTION_MAX_FILES, AUDIO_RETENTION_MAX_BYTES
+)
 from .display import display
 
 
@@ -20,6 +23,9 @@ class FileCleanup:
         
         # Ensure recordings directory exists (but don't clean it)
         self._ensure_recordings_directory_exists()
+        
+        # Synthesized responses are kept, but only up to the retention limits
+        self.prune_audio_directory()
     
     def cleanup_recordings(self):
         """Clean up recordings directory (call this manually when needed)"""
@@ -72,6 +78,29 @@ class FileCleanup:
         # Now clean up the transcripts folder
         self._cleanup_directory(self.transcript_directory)
     
+    def prune_audio_directory(self, max_files=AUDIO_RETENTION_MAX_FILES, max_bytes=AUDIO_RETENTION_MAX_BYTES):
+        """Delete the oldest synthesized responses beyond the retention limits; returns bytes kept"""
+        if not os.path.exists(AUDIO_DIR):
+            return 0
+        files = sorted(
+            (entry for entry in os.scandir(AUDIO_DIR) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        total = sum(entry.stat().st_size for entry in files)
+        removed = 0
+        while files and (len(files) > max_files or total > max_bytes):
+            oldest = files.pop(0)
+            try:
+                size = oldest.stat().st_size
+                os.unlink(oldest.path)
+                total -= size
+                removed += 1
+            except OSError as e:
+                print(f"Error removing {oldest.path}: {e}")
+        if removed:
+            print(f"Pruned {removed} old audio file(s) from {AUDIO_DIR}")
+        return total
+    
     def cleanup_specific_directory(self, directory_path):
         """Clean up a specific directory"""
         self._cleanup_directory(directory_path)
@@ -0,0 +1,149 @@
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class DiskCache:
+    """Content-addressed blob store with a JSON index and LRU eviction by entry count and size"""
+
+    INDEX_FILE = "index.json"
+    INDEX_FLUSH_SECONDS = 30  # Hits only update access times, so they are written out at most this often
+
+    def __init__(self, directory, max_bytes, max_entries=None, extension=".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index_dirty = False
+        self._index_saved_at = 0.0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.index = self._load_index()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash any mix of bytes and values into a stable cache key"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, (bytes, bytearray, memoryview)):
+                part = repr(part).encode("utf-8")
+            digest.update(part)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None  # Evicted by another thread since the lookup
+
+    def get_path(self, key):
+        """Return the file backing a cached entry (and mark it recently used), or None"""
+        with self._lock:
+            entry = self.index.get(key)
+            path = self._blob_path(key)
+            if entry is None or not os.path.exists(path):
+                self.index.pop(key, None)
+                self.misses += 1
+                return None
+            entry["last_access"] = time.time()
+            self.hits += 1
+            self._index_dirty = True
+            if time.time() - self._index_saved_at >= self.INDEX_FLUSH_SECONDS:
+                self._save_index()
+            return path
+
+    def put(self, key, data, **meta):
+        path = self._blob_path(key)
+        # A temp file of its own, so concurrent writers of the same key can't rename each other's
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self.index[key] = {"size": len(data), "last_access": time.time(), "meta": meta}
+            self._evict()
+            self._save_index()
+        return path
+
+    def flush(self):
+        """Write out access times recorded since the last index save"""
+        with self._lock:
+            if self._index_dirty:
+                self._save_index()
+
+    def contains(self, key):
+        with self._lock:
+            return key in self.index and os.path.exists(self._blob_path(key))
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.index),
+                "bytes": sum(entry["size"] for entry in self.index.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self.index.values())
+        by_age = sorted(self.index.items(), key=lambda item: item[1]["last_access"])
+        for key, entry in by_age:
+            over_size = total > self.max_bytes
+            over_count = self.max_entries is not None and len(self.index) > self.max_entries
+            if not (over_size or over_count):
+                break
+            try:
+                os.unlink(self._blob_path(key))
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del self.index[key]
+            self.evictions += 1
+
+    def _blob_path(self, key):
+        return os.path.join(self.directory, f"{key}{self.extension}")
+
+    def _load_index(self):
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        try:
+            with open(index_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Cache index {index_path} unreadable, starting empty: {e}")
+            return {}
+
+    def _save_index(self):
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, index_path)
+        self._index_dirty = False
+        self._index_saved_at = time.time()
@@ -87,6 +87,9 @@ class TerryDisplay:
         else:
             print(f"{self.GRAY}[{timestamp}]{self.RESET} {self.BOLD}👤 You:{self.RESET} {message}")
     
+    def partial_transcript(self, message: str):
+        print(f"{self.GRAY}   … {message}{self.RESET}")
+    
     def bot_response(self, message: str, question_num: Optional[int] = None):
         timestamp = self._get_timestamp()
         prefix = "🍺 Terry:"
@@ -94,6 +97,19 @@ class TerryDisplay:
             prefix = f"🍺 Terry [Q{question_num}]:"
         print(f"{self.GRAY}[{timestamp}]{self.RESET} {self.YELLOW}{prefix}{self.RESET} {message}")
     
+    def bot_response_start(self, question_num: Optional[int] = None):
+        timestamp = self._get_timestamp()
+        prefix = "🍺 Terry:"
+        if question_num:
+            prefix = f"🍺 Terry [Q{question_num}]:"
+        print(f"{self.GRAY}[{timestamp}]{self.RESET} {self.YELLOW}{prefix}{self.RESET} ", end="", flush=True)
+    
+    def bot_response_token(self, token: str):
+        print(token, end="", flush=True)
+    
+    def bot_response_end(self):
+        print()
+    
     def recording_start(self):
         print(f"\n{self.BG_RED}{self.WHITE} ● REC {self.RESET} {self.RED}Hold spacebar to record...{self.RESET}")
     
@@ -0,0 +1,205 @@
+"""
+Ollama connection for Terry the Tube
+Loads the chat model into memory at boot, keeps it resident while idle and answers
+health checks from Ollama's model listing, so a cold load never lands on a customer's turn.
+Also streams completions on connections that can be dropped mid-request.
+"""
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+from config import (
+    OLLAMA_MODEL, OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, OLLAMA_PRELOAD_TIMEOUT,
+    OLLAMA_HEALTH_CACHE_SECONDS, OLLAMA_RESIDENCY_INTERVAL, OLLAMA_TEMPERATURE, OLLAMA_TIMEOUT
+)
+
+_residency_thread = None
+_lock = threading.Lock()
+_health = None  # Last health check result, reused for OLLAMA_HEALTH_CACHE_SECONDS
+_stats = {
+    "preloads": 0,
+    "reloads": 0,
+    "last_load_seconds": None
+}
+
+
+def _model_names(models):
+    names = set()
+    for model in models:
+        names.add(model.get("name"))
+        names.add(model.get("model"))
+    return names
+
+
+def _is_our_model(names):
+    # Ollama reports "mistral" as "mistral:latest"
+    return OLLAMA_MODEL in names or f"{OLLAMA_MODEL}:latest" in names
+
+
+def preload_model():
+    """Load the model into memory without generating anything; blocks until it is resident"""
+    if requests is None:
+        print("Ollama preload skipped: requests package not installed")
+        return False
+    start_time = time.time()
+    try:
+        # A generate request with no prompt only loads the model
+        response = requests.post(
+            f"{OLLAMA_BASE_URL}/api/generate",
+            json={"model": OLLAMA_MODEL, "keep_alive": OLLAMA_KEEP_ALIVE},
+            timeout=OLLAMA_PRELOAD_TIMEOUT
+        )
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Ollama preload of {OLLAMA_MODEL} failed: {e}")
+        return False
+
+    load_seconds = time.time() - start_time
+    with _lock:
+        _stats["preloads"] += 1
+        _stats["last_load_seconds"] = load_seconds
+    _invalidate_health()
+    print(f"Ollama model {OLLAMA_MODEL} loaded in {load_seconds:.2f}s")
+    return True
+
+
+def _drop_connection(connection):
+    # shutdown() rather than close(): it also wakes the thread blocked reading the socket
+    sock = connection.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def stream_generate(prompt, num_predict=None, on_open=None, timeout=OLLAMA_TIMEOUT):
+    """
+    Stream a completion from /api/generate, yielding text as it arrives. The request gets a
+    connection of its own, and on_open is handed a function that drops it: Ollama stops
+    generating as soon as its client goes away, even while still reading the prompt.
+    """
+    url = urlsplit(OLLAMA_BASE_URL)
+    connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(url.hostname, url.port, timeout=timeout)
+    options = {"temperature": OLLAMA_TEMPERATURE}
+    if num_predict:
+        options["num_predict"] = num_predict
+    body = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE,  # Sent with every request so it doesn't reset to Ollama's 5 minutes
+        "options": options
+    }
+    try:
+        connection.connect()
+        if on_open:
+            on_open(lambda: _drop_connection(connection))
+        connection.request("POST", f"{url.path.rstrip('/')}/api/generate", body=json.dumps(body),
+                           headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        if response.status != 200:
+            raise Exception(f"Ollama returned HTTP {response.status}: {response.read(200).decode(errors='replace')}")
+        # One JSON object per line
+        for line in response:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise Exception(f"Ollama error: {data['error']}")
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                return
+    finally:
+        connection.close()
+
+
+def _check_health():
+    health = {"reachable": False, "installed": False, "loaded": False, "checked_at": time.time()}
+    if requests is None:
+        return health
+    try:
+        # /api/ps lists resident models; only fall back to /api/tags if ours isn't one of them
+        response = requests.get(f"{OLLAMA_BASE_URL}/api/ps", timeout=2)
+        response.raise_for_status()
+        health["reachable"] = True
+        health["loaded"] = _is_our_model(_model_names(response.json().get("models", [])))
+        if health["loaded"]:
+            health["installed"] = True
+        else:
+            response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=2)
+            response.raise_for_status()
+            health["installed"] = _is_our_model(_model_names(response.json().get("models", [])))
+    except Exception as e:
+        print(f"Ollama health check failed: {e}")
+    return health
+
+
+def get_health(max_age=OLLAMA_HEALTH_CACHE_SECONDS):
+    """Return {reachable, installed, loaded}, reusing a recent result"""
+    global _health
+    with _lock:
+        health = _health
+    if health is None or time.time() - health["checked_at"] > max_age:
+        health = _check_health()
+        with _lock:
+            _health = health
+    return dict(health)
+
+
+def _invalidate_health():
+    global _health
+    with _lock:
+        _health = None
+
+
+def is_model_available():
+    health = get_health()
+    return health["reachable"] and health["installed"]
+
+
+def _residency_loop(interval):
+    while True:
+        time.sleep(interval)
+        health = get_health(max_age=0)
+        if health["reachable"] and health["installed"] and not health["loaded"]:
+            # Evicted (idle expiry, another model, Ollama restart): reload before the next customer
+            print(f"Ollama model {OLLAMA_MODEL} is no longer loaded, reloading")
+            if preload_model():
+                with _lock:
+                    _stats["reloads"] += 1
+
+
+def start_residency(preload=True, interval=OLLAMA_RESIDENCY_INTERVAL):
+    """Preload the model now, then keep checking in the background that it is still resident"""
+    global _residency_thread
+    if preload:
+        preload_model()
+    with _lock:
+        if _residency_thread is None and interval > 0:
+            _residency_thread = threading.Thread(target=_residency_loop, args=(interval,), daemon=True)
+            _residency_thread.start()
+
+
+def get_ollama_stats():
+    with _lock:
+        stats = dict(_stats)
+        health = dict(_health) if _health else None
+    stats["model"] = OLLAMA_MODEL
+    stats["keep_alive"] = OLLAMA_KEEP_ALIVE
+    stats["health"] = health
+    return stats
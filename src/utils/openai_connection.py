@@ -0,0 +1,129 @@
+"""
+Shared OpenAI client for Terry the Tube
+One process-wide client with a pooled keep-alive HTTP connection, warmed at boot and kept
+warm while idle so customer-facing chat and TTS calls never pay for TLS setup
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+try:
+    import httpx
+    from openai import OpenAI
+except ImportError:
+    httpx = None
+    OpenAI = None
+
+from config import (
+    OPENAI_CHAT_MODEL, OPENAI_POOL_MAX_CONNECTIONS, OPENAI_POOL_MAX_KEEPALIVE,
+    OPENAI_POOL_KEEPALIVE_EXPIRY, OPENAI_KEEPALIVE_INTERVAL
+)
+
+_client = None
+_client_lock = threading.Lock()
+_keepalive_thread = None
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "warmups": 0,
+    "keepalives": 0,
+    "last_request_time": 0.0
+}
+
+
+def _trace(event_name, info):
+    # httpcore only emits connect events when it has to open a new connection
+    if event_name == "connection.connect_tcp.complete":
+        with _stats_lock:
+            _stats["new_connections"] += 1
+
+
+def _on_request(request):
+    request.extensions["trace"] = _trace
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["last_request_time"] = time.time()
+
+
+def get_openai_client():
+    """Return the shared OpenAI client, creating it on first use (uses OPENAI_API_KEY)"""
+    global _client
+    if OpenAI is None:
+        raise ImportError("openai package not installed")
+    with _client_lock:
+        if _client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENAI_POOL_KEEPALIVE_EXPIRY
+                ),
+                event_hooks={"request": [_on_request]}
+            )
+            _client = OpenAI(http_client=http_client)
+        return _client
+
+
+def _ping():
+    # Model metadata is the cheapest authenticated request; it costs no tokens
+    get_openai_client().models.retrieve(OPENAI_CHAT_MODEL)
+
+
+def warm_up():
+    start_time = time.time()
+    try:
+        _ping()
+        with _stats_lock:
+            _stats["warmups"] += 1
+        print(f"OpenAI connection warmed in {time.time() - start_time:.2f}s")
+        return True
+    except Exception as e:
+        print(f"OpenAI warm-up failed: {e}")
+        return False
+
+
+def _keepalive_loop(interval):
+    while True:
+        with _stats_lock:
+            idle = time.time() - _stats["last_request_time"]
+        if idle < interval:
+            time.sleep(interval - idle)
+            continue
+        try:
+            _ping()
+            with _stats_lock:
+                _stats["keepalives"] += 1
+        except Exception as e:
+            print(f"OpenAI keep-alive failed: {e}")
+            time.sleep(interval)
+
+
+def start_keepalive(warm=True, interval=OPENAI_KEEPALIVE_INTERVAL):
+    """Warm the pool and keep a connection open in the background"""
+    global _keepalive_thread
+
+    def run():
+        if warm:
+            warm_up()
+        if interval > 0:
+            _keepalive_loop(interval)
+
+    with _client_lock:
+        if _keepalive_thread is None:
+            _keepalive_thread = threading.Thread(target=run, daemon=True)
+            _keepalive_thread.start()
+
+
+def get_connection_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    reused = max(stats["requests"] - stats["new_connections"], 0)
+    stats["reused_connections"] = reused
+    stats["reuse_rate"] = reused / stats["requests"] if stats["requests"] else 0.0
+    last_request_time = stats.pop("last_request_time")
+    stats["seconds_since_last_request"] = time.time() - last_request_time if last_request_time else None
+    return stats
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+TTS benchmark for Terry the Tube
+Measures time-to-first-audio and total synthesis time for each available TTS backend
+on a few representative lines, bypassing the phrase cache
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import DEFAULT_PERSONALITY
+from audio.openai_tts_client import OpenAITTSClient
+from audio.local_tts_client import LocalTTSClient
+from utils.display import display
+
+SAMPLE_LINES = [
+    "Yeah?",
+    "Oh great, another one. What do you want, a beer? Shocking.",
+    "Alright, three questions and you get your beer. First one: what's the worst thing you've ever "
+    "ordered at a bar, and don't lie to me, I can tell when people lie."
+]
+
+
+def _time_backend(backend, text, runs):
+    first_audio = []
+    total = []
+    for _ in range(runs):
+        start_time = time.time()
+        sample_rate, chunks = backend.iter_pcm(text)
+        audio_bytes = 0
+        for chunk in chunks:
+            if not audio_bytes:
+                first_audio.append(time.time() - start_time)
+            audio_bytes += len(chunk)
+        total.append(time.time() - start_time)
+    audio_seconds = audio_bytes / 2.0 / sample_rate
+    return {
+        "first_audio_seconds": sum(first_audio) / len(first_audio) if first_audio else None,
+        "total_seconds": sum(total) / len(total),
+        "audio_seconds": audio_seconds
+    }
+
+
+def tts_benchmark(personality_key=DEFAULT_PERSONALITY, runs=3):
+    display.header("TTS Benchmark")
+    backends = [backend for backend in (OpenAITTSClient(), LocalTTSClient()) if backend.is_available()]
+    if not backends:
+        display.error("No TTS backend available")
+        return {}
+
+    results = {}
+    for backend in backends:
+        backend.set_personality(personality_key)
+        # One untimed call so model loading and connection setup aren't counted
+        try:
+            list(backend.iter_pcm("Warm up.")[1])
+        except Exception as e:
+            display.warning(f"{backend.name}: warm-up failed ({e}), skipping")
+            continue
+
+        results[backend.name] = []
+        for text in SAMPLE_LINES:
+            result = _time_backend(backend, text, runs)
+            results[backend.name].append(result)
+            first_audio = result["first_audio_seconds"]
+            # None when synthesis produced no audio for the line
+            first_audio = "n/a" if first_audio is None else f"{first_audio:.3f}s"
+            display.info(f"{backend.name:>6} | {len(text):>3} chars | first audio "
+                         f"{first_audio} | total {result['total_seconds']:.3f}s | "
+                         f"{result['audio_seconds']:.1f}s of audio")
+
+    for name, rows in results.items():
+        timed = [row["first_audio_seconds"] for row in rows if row["first_audio_seconds"] is not None]
+        if not timed:
+            display.warning(f"{name}: no line produced audio")
+            continue
+        average = sum(timed) / len(timed)
+        display.success(f"{name}: average time to first audio {average:.3f}s over {runs} run(s) per line "
+                        f"({len(timed)}/{len(rows)} lines)")
+    return results
+
+
+if __name__ == "__main__":
+    tts_benchmark(*sys.argv[1:2])
@@ -65,3 +65,21 @@ def get_voice_settings(personality_key):
         "speed": instruction["speed"],
         "instruction": instruction["instruction"]
     }
+
+
+# Local (offline) voices used when OpenAI TTS is unavailable. Piper models are looked up as
+# <LOCAL_TTS_VOICE_DIR>/<piper_model>.onnx; length_scale < 1 speaks faster.
+LOCAL_VOICES = {
+    "sarcastic_comedian": {"piper_model": "en_US-ryan-high", "length_scale": 0.75, "espeak_voice": "en-us+m3", "espeak_speed": 220},
+    "passive_aggressive_librarian": {"piper_model": "en_US-amy-medium", "length_scale": 0.85, "espeak_voice": "en-us+f2", "espeak_speed": 170},
+    "condescending_childrens_host": {"piper_model": "en_US-kristin-medium", "length_scale": 0.9, "espeak_voice": "en-us+f4", "espeak_speed": 190},
+    "dungeon_master": {"piper_model": "en_GB-alan-medium", "length_scale": 1.0, "espeak_voice": "en-gb+m1", "espeak_speed": 150},
+    "glitching_ai": {"piper_model": "en_US-lessac-medium", "length_scale": 1.0, "espeak_voice": "en-us+m7", "espeak_speed": 160},
+    "disappointed_dad": {"piper_model": "en_US-joe-medium", "length_scale": 1.15, "espeak_voice": "en-us+m1", "espeak_speed": 140},
+    "corporate_hr_drone": {"piper_model": "en_US-amy-medium", "length_scale": 1.0, "espeak_voice": "en-us+f3", "espeak_speed": 175},
+    "hot_mess_aunt": {"piper_model": "en_US-kristin-medium", "length_scale": 0.95, "espeak_voice": "en-us+f5", "espeak_speed": 165}
+}
+
+def get_local_voice_settings(personality_key):
+    """Get the offline TTS voice for a specific personality"""
+    return LOCAL_VOICES.get(personality_key, LOCAL_VOICES["sarcastic_comedian"])
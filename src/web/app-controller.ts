@@ -5,13 +5,19 @@ import { WebSocketManager } from './websocket-manager';
 /**
  * Main application controller coordinating all components
  */
+const AUDIO_CHUNK_MS = 250; // MediaRecorder timeslice for browser audio uploads
+
 export class AppController {
     private wsManager: WebSocketManager;
     private initialized: boolean;
+    private micStream: MediaStream | null;
+    private mediaRecorder: MediaRecorder | null;
 
     constructor() {
         this.wsManager = new WebSocketManager();
         this.initialized = false;
+        this.micStream = null;
+        this.mediaRecorder = null;
     }
     
     /**
@@ -151,6 +157,11 @@ export class AppController {
         
         if (isRecording) return;
         
+        if (this.useBrowserAudio()) {
+            this.startBrowserRecording();
+            return;
+        }
+        
         try {
             window.appState.set('ui.recording', true);
             
@@ -167,12 +178,92 @@ export class AppController {
         }
     }
     
+    /**
+     * Record in the browser and stream chunks to the server instead of using the host mic
+     */
+    private useBrowserAudio(): boolean {
+        return Boolean(window.appState.get('ui.browserAudio') && navigator.mediaDevices && window.MediaRecorder);
+    }
+    
+    private async startBrowserRecording(): Promise<void> {
+        window.appState.set('ui.recording', true);
+        
+        try {
+            // Keep the microphone open between turns so later presses start instantly
+            if (!this.micStream) {
+                this.micStream = await navigator.mediaDevices.getUserMedia({
+                    audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true }
+                });
+            }
+            
+            // Button released while the permission prompt was showing
+            if (!window.appState.get('ui.recording')) return;
+            
+            const uploadId = `${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
+            const mimeType = MediaRecorder.isTypeSupported('audio/webm;codecs=opus') ? 'audio/webm;codecs=opus' : '';
+            const recorder = new MediaRecorder(this.micStream, mimeType ? { mimeType } : undefined);
+            
+            let uploads: Promise<unknown> = Promise.resolve(
+                this.wsManager.sendMessage('start_upload', { upload_id: uploadId })
+            );
+            recorder.ondataavailable = (event: BlobEvent) => {
+                if (event.data.size > 0) {
+                    // Chain uploads so chunks reach the server's decoder in order
+                    uploads = uploads.then(() => this.uploadAudioChunk(uploadId, event.data));
+                }
+            };
+            recorder.onstop = () => {
+                uploads.then(() => this.wsManager.sendMessage('stop_upload', { upload_id: uploadId }));
+            };
+            
+            recorder.start(AUDIO_CHUNK_MS);
+            this.mediaRecorder = recorder;
+            console.log('Browser recording started');
+        } catch (error) {
+            console.error('Error starting browser recording:', error);
+            window.uiController.showError(`Failed to access microphone: ${(error as Error).message}`);
+            window.appState.set('ui.recording', false);
+        }
+    }
+    
+    private stopBrowserRecording(): void {
+        window.appState.set('ui.recording', false);
+        
+        if (this.mediaRecorder) {
+            this.mediaRecorder.stop();
+            this.mediaRecorder = null;
+            window.appState.set('ui.loadingStates.generatingResponse', true);
+            console.log('Browser recording stopped');
+        }
+    }
+    
+    private async uploadAudioChunk(uploadId: string, blob: Blob): Promise<boolean> {
+        try {
+            const response = await fetch(`/api/audio/chunk?id=${encodeURIComponent(uploadId)}`, {
+                method: 'POST',
+                body: blob
+            });
+            if (!response.ok) {
+                console.error('Audio chunk upload failed:', response.status);
+            }
+            return response.ok;
+        } catch (error) {
+            console.error('Error uploading audio chunk:', error);
+            return false;
+        }
+    }
+    
     /**
      * Stop recording with error handling
      */
     stopRecording(): void {
         const currentRecording = window.appState.get('ui.recording');
         
+        if (currentRecording && this.useBrowserAudio()) {
+            this.stopBrowserRecording();
+            return;
+        }
+        
         if (currentRecording) {
             try {
                 window.appState.set('ui.recording', false);
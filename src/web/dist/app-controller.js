@@ -1,8 +1,11 @@
 // Terry the Tube - Main Application Controller
+const AUDIO_CHUNK_MS = 250; // MediaRecorder timeslice for browser audio uploads
 class AppController {
     constructor() {
         this.pollingManager = new PollingManager();
         this.initialized = false;
+        this.micStream = null;
+        this.mediaRecorder = null;
     }
     init() {
         if (this.initialized)
@@ -96,6 +99,10 @@ class AppController {
         }
         if (isRecording)
             return;
+        if (window.appState.get('ui.browserAudio') && navigator.mediaDevices && window.MediaRecorder) {
+            this.startBrowserRecording();
+            return;
+        }
         try {
             window.appState.set('ui.recording', true);
             const success = this.pollingManager.sendMessage('start_recording');
@@ -112,8 +119,56 @@ class AppController {
             window.appState.set('ui.recording', false);
         }
     }
+    async startBrowserRecording() {
+        window.appState.set('ui.recording', true);
+        try {
+            // Keep the microphone open between turns so later presses start instantly
+            if (!this.micStream) {
+                this.micStream = await navigator.mediaDevices.getUserMedia({
+                    audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true }
+                });
+            }
+            // Button released while the permission prompt was showing
+            if (!window.appState.get('ui.recording'))
+                return;
+            const uploadId = `${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
+            const mimeType = MediaRecorder.isTypeSupported('audio/webm;codecs=opus') ? 'audio/webm;codecs=opus' : '';
+            const recorder = new MediaRecorder(this.micStream, mimeType ? { mimeType } : undefined);
+            let uploads = this.pollingManager.sendAction('start_upload', { upload_id: uploadId });
+            recorder.ondataavailable = (event) => {
+                if (event.data.size > 0) {
+                    // Chain uploads so chunks reach the server's decoder in order
+                    uploads = uploads.then(() => this.pollingManager.uploadAudioChunk(uploadId, event.data));
+                }
+            };
+            recorder.onstop = () => {
+                uploads.then(() => this.pollingManager.sendAction('stop_upload', { upload_id: uploadId }));
+            };
+            recorder.start(AUDIO_CHUNK_MS);
+            this.mediaRecorder = recorder;
+            console.log('Browser recording started');
+        }
+        catch (error) {
+            console.error('Error starting browser recording:', error);
+            window.uiController.showError(`Failed to access microphone: ${error.message}`);
+            window.appState.set('ui.recording', false);
+        }
+    }
+    stopBrowserRecording() {
+        window.appState.set('ui.recording', false);
+        if (this.mediaRecorder) {
+            this.mediaRecorder.stop();
+            this.mediaRecorder = null;
+            window.appState.set('ui.loadingStates.generatingResponse', true);
+            console.log('Browser recording stopped');
+        }
+    }
     stopRecording() {
         const currentRecording = window.appState.get('ui.recording');
+        if (currentRecording && window.appState.get('ui.browserAudio') && navigator.mediaDevices && window.MediaRecorder) {
+            this.stopBrowserRecording();
+            return;
+        }
         if (currentRecording) {
             try {
                 window.appState.set('ui.recording', false);
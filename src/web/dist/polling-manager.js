@@ -47,6 +47,7 @@ class PollingManager {
                     'ui.loadingStates.generatingAudio': state.generating_audio,
                     'ui.textChatEnabled': state.text_chat_enabled || false,
                     'ui.textOnlyMode': state.text_only_mode || false,
+                    'ui.browserAudio': state.browser_audio || false,
                     'ui.personalityOverlayVisible': !state.personality_selected
                 });
                 
@@ -117,6 +118,22 @@ class PollingManager {
         }
     }
 
+    async uploadAudioChunk(uploadId, blob) {
+        try {
+            const response = await fetch(`/api/audio/chunk?id=${encodeURIComponent(uploadId)}`, {
+                method: 'POST',
+                body: blob
+            });
+            if (!response.ok) {
+                console.error('Audio chunk upload failed:', response.status);
+            }
+            return response.ok;
+        } catch (error) {
+            console.error('Error uploading audio chunk:', error);
+            return false;
+        }
+    }
+
     // Public methods that match WebSocket interface
     sendMessage(action, data = {}) {
         return this.sendAction(action, data);
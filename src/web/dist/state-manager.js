@@ -14,6 +14,7 @@ class AppState {
             ui: {
                 recording: false,
                 textChatEnabled: false,
+                browserAudio: false,
                 personalityOverlayVisible: true,
                 lastMessageCount: 0,
                 lastStatus: '',
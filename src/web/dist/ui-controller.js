@@ -119,6 +119,11 @@ class UIController {
                 messageDiv.classList.remove('pending');
                 messageDiv.classList.add('show');
             }
+            // Sync text for messages that grow in place (live transcripts, streamed replies)
+            const bubble = messageDiv?.querySelector('.message-bubble');
+            if (bubble && bubble.textContent !== msg.message) {
+                bubble.textContent = msg.message;
+            }
         });
     }
     createMessageElement(msg, index) {
@@ -27,6 +27,7 @@ export class AppState {
             ui: {
                 recording: false,
                 textChatEnabled: false,
+                browserAudio: false,
                 personalityOverlayVisible: true,
                 lastMessageCount: 0,
                 lastStatus: '',
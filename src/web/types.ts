@@ -82,6 +82,7 @@ export interface ErrorInfo {
 export interface UIState {
     recording: boolean;
     textChatEnabled: boolean;
+    browserAudio: boolean;
     personalityOverlayVisible: boolean;
     lastMessageCount: number;
     lastStatus: string;
@@ -163,13 +163,17 @@ export class UIController {
             messagesDiv.scrollTop = messagesDiv.scrollHeight;
         }
         
-        // Check for messages that should now be visible
+        // Check for messages that should now be visible or whose text has grown
         messages.forEach((msg, index) => {
             const messageDiv = document.querySelector(`[data-message-id="${index}"]`);
             if (messageDiv && msg.show_immediately && messageDiv.classList.contains('pending')) {
                 messageDiv.classList.remove('pending');
                 messageDiv.classList.add('show');
             }
+            const bubble = messageDiv?.querySelector('.message-bubble');
+            if (bubble && bubble.textContent !== msg.message) {
+                bubble.textContent = msg.message;
+            }
         });
     }
     
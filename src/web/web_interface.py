@@ -2,7 +2,7 @@ import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from config import WEB_PORT, WEB_HOST
+from config import WEB_PORT, WEB_HOST, BROWSER_AUDIO_CAPTURE
 
 # Import the template system
 from .web_templates import get_main_html_template
@@ -20,8 +20,10 @@ class WebInterface:
         self.personality_selected_by_user = False  # Track if user explicitly selected personality
         self.generating_audio = False  # Track if we're generating TTS audio
         self.generating_response = False  # Track if we're generating LLM response
+        self.speaking = False  # Track if Terry's audio is playing
         self.text_chat_enabled = enable_text_chat  # Track if text chat is enabled
         self.text_only_mode = text_only_mode  # Track if in text-only mode
+        self.browser_audio_enabled = BROWSER_AUDIO_CAPTURE  # Record in the browser and upload chunks
         
     def add_message(self, sender, message, is_ai=False, show_immediately=True):
         timestamp = time.strftime("%H:%M:%S")
@@ -36,6 +38,11 @@ class WebInterface:
         self._notify_state_change()
         return len(self.messages) - 1  # Return message index
         
+    def update_message(self, message_index, message):
+        if 0 <= message_index < len(self.messages):
+            self.messages[message_index]['message'] = message
+            self._notify_state_change()
+
     def set_status(self, status):
         self.status = status
         self._notify_state_change()
@@ -57,6 +64,18 @@ class WebInterface:
     def is_generating_audio(self):
         return self.generating_audio
     
+    def set_speaking(self, speaking):
+        self.speaking = speaking
+        if speaking:
+            self.status = "Speaking..."
+        elif self.status == "Speaking...":
+            # Don't overwrite statuses set mid-sentence (beer dispensed, conversation ended)
+            self.status = "Ready to serve beer!"
+        self._notify_state_change()
+
+    def is_speaking(self):
+        return self.speaking
+
     def set_generating_response(self, generating):
         self.generating_response = generating
         self._notify_state_change()
@@ -78,6 +97,9 @@ class WebInterface:
     def is_text_only_mode(self):
         return self.text_only_mode
     
+    def is_browser_audio_enabled(self):
+        return self.browser_audio_enabled
+    
     def handle_action(self, action, data=None):
         if self.message_callback:
             self.message_callback(action, data)
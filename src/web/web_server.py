@@ -1,6 +1,7 @@
 import json
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -21,6 +22,8 @@ class WebHandler(BaseHTTPRequestHandler):
     def do_POST(self):
         if self.path == '/api/action':
             self._handle_api_action()
+        elif self.path.startswith('/api/audio/chunk'):
+            self._handle_audio_chunk()
         else:
             self._serve_404()
     
@@ -46,9 +49,11 @@ class WebHandler(BaseHTTPRequestHandler):
             'personality': self.server.web_interface.get_personality_info(),
             'personality_selected': self.server.web_interface.is_personality_selected(),
             'generating_audio': self.server.web_interface.is_generating_audio(),
+            'speaking': self.server.web_interface.is_speaking(),
             'generating_response': self.server.web_interface.is_generating_response(),
             'text_chat_enabled': self.server.web_interface.is_text_chat_enabled(),
-            'text_only_mode': self.server.web_interface.is_text_only_mode()
+            'text_only_mode': self.server.web_interface.is_text_only_mode(),
+            'browser_audio': self.server.web_interface.is_browser_audio_enabled()
         }
         self.wfile.write(json.dumps(state).encode())
     
@@ -84,6 +89,8 @@ class WebHandler(BaseHTTPRequestHandler):
                 self.server.web_interface.handle_action('send_text_message', payload)
             elif action == 'select_personality':
                 self.server.web_interface.handle_action('change_personality', payload)
+            elif action in ('start_upload', 'stop_upload'):
+                self.server.web_interface.handle_action(action, payload)
             else:
                 self.send_response(400)
                 self.send_header('Content-type', 'application/json')
@@ -104,6 +111,33 @@ class WebHandler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(json.dumps({'error': str(e)}).encode())
     
+    def _handle_audio_chunk(self):
+        """Receive one chunk of browser-recorded audio as a raw request body"""
+        try:
+            upload_id = parse_qs(urlparse(self.path).query).get('id', [None])[0]
+            if not upload_id:
+                self.send_response(400)
+                self.send_header('Content-type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({'error': 'Missing upload id'}).encode())
+                return
+
+            content_length = int(self.headers['Content-Length'])
+            chunk = self.rfile.read(content_length)
+            self.server.web_interface.handle_action('upload_chunk', {'upload_id': upload_id, 'chunk': chunk})
+
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps({'success': True}).encode())
+
+        except Exception as e:
+            self.send_response(500)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({'error': str(e)}).encode())
+
     def _send_ok_response(self):
         self.send_response(200)
         self.end_headers()
@@ -118,8 +152,8 @@ class WebHandler(BaseHTTPRequestHandler):
 
 
 def start_web_server(web_interface):
-    # Start HTTP server with REST API endpoints
-    server = HTTPServer((web_interface.host, web_interface.port), WebHandler)
+    # Start HTTP server with REST API endpoints (threaded so uploads don't block polling)
+    server = ThreadingHTTPServer((web_interface.host, web_interface.port), WebHandler)
     server.web_interface = web_interface
     print(f"Web interface started at: http://{web_interface.host}:{web_interface.port}")
     print(f"API endpoints available at: http://{web_interface.host}:{web_interface.port}/api/")